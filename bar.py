@@ -9,52 +9,324 @@
 # The coding style remains consistent across functions
 # Functions handle the todo list appropriately
 # Error handling follows similar patterns
-todos = []
+import os
+import tempfile
+
+
+class IdAllocator:
+    """Hands out todo IDs that only ever go up, so an ID is never reused after a removal.
+
+    With a path, the allocator persists how far it has got: it reserves
+    block_size IDs at a time and writes the end of the reserved block to
+    the file before handing any of them out. A new allocator on the same
+    file continues after that block, so IDs stay unique across restarts
+    and crashes (at worst the rest of a block is skipped) while the file
+    is only written once per block.
+    """
+
+    def __init__(self, path: str = None, block_size: int = 1000):
+        if block_size < 1:
+            raise ValueError("block_size must be at least 1")
+        self.path = path
+        self.block_size = block_size
+        self.last = 0        # last ID handed out
+        self._reserved = 0   # IDs up to this one are recorded in the file
+        if path is not None and os.path.exists(path):
+            with open(path, encoding="utf-8") as counter_file:
+                self.last = self._reserved = int(counter_file.read())
+
+    def allocate(self) -> int:
+        """Get the next ID."""
+        todo_id = self.last + 1
+        if self.path is not None and todo_id > self._reserved:
+            self._reserve(todo_id + self.block_size - 1)
+        self.last = todo_id
+        return todo_id
+
+    def advance(self, todo_id: int):
+        """Make sure every ID handed out from now on is greater than todo_id."""
+        if todo_id > self.last:
+            if self.path is not None and todo_id > self._reserved:
+                self._reserve(todo_id + self.block_size - 1)
+            self.last = todo_id
+
+    def _reserve(self, ceiling: int):
+        """Record ceiling in the file (write a temporary file, then rename)."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temporary = tempfile.mkstemp(dir=directory, prefix=".ids-", suffix=".tmp")
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as counter_file:
+                counter_file.write(f"{ceiling}\n")
+                counter_file.flush()
+                os.fsync(counter_file.fileno())
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self._reserved = ceiling
+
+
+class TodoStore:
+    """Todos keyed by ID, with indexes by priority and completion status.
+
+    Every operation is O(1), or O(result) for the listing ones, however many
+    todos there are. The one exception: after todos are completed out of ID
+    order, the next list("completed") re-sorts the completed index once.
+    Todos are plain dicts with id, task, priority and completed keys; change
+    them through the store so the indexes stay right.
+
+    With a backend (see todo_backends.py) the store loads the saved todos
+    when it is created and records every change; call close() when done.
+    """
+
+    def __init__(self, ids: IdAllocator = None, backend=None):
+        self.ids = ids if ids is not None else IdAllocator()
+        self.backend = backend
+        self._reset()
+        if backend is not None:
+            saved_todos, last_id = backend.load()
+            for todo in saved_todos:
+                self._index(todo)
+            self.ids.advance(last_id)
+
+    def _reset(self):
+        self._todos = {}         # id -> todo, in the order they were added
+        self._by_priority = {}   # priority -> {id: todo}
+        self._pending = {}       # id -> todo, in the order they were added
+        self._completed = {}     # id -> todo, in ID order unless _completed_sorted is False
+        self._completed_sorted = True
+        self._completed_last = 0  # highest ID completed (may be stale after removals)
+
+    def _index(self, todo):
+        todo_id = todo["id"]
+        self._todos[todo_id] = todo
+        self._by_priority.setdefault(todo["priority"], {})[todo_id] = todo
+        if todo["completed"]:
+            self._add_completed(todo)
+        else:
+            self._pending[todo_id] = todo
+
+    def __len__(self):
+        return len(self._todos)
+
+    def __iter__(self):
+        return iter(list(self._todos.values()))
+
+    def __contains__(self, todo_id):
+        return todo_id in self._todos
+
+    def get(self, todo_id: int):
+        """Get a todo by its ID, or None."""
+        return self._todos.get(todo_id)
+
+    def add(self, task: str, priority: str = "medium"):
+        """Add a new todo and return it."""
+        todo = {
+            "id": self.ids.allocate(),
+            "task": task,
+            "priority": priority,
+            "completed": False
+        }
+        self._index(todo)
+        if self.backend is not None and self.backend.added(todo):
+            self.compact()
+        return todo
+
+    def add_many(self, tasks):
+        """Add (task, priority) pairs in one pass and return how many were added."""
+        backend = self.backend
+        compact = False
+        count = 0
+        for task, priority in tasks:
+            todo = {
+                "id": self.ids.allocate(),
+                "task": task,
+                "priority": priority,
+                "completed": False
+            }
+            self._index(todo)
+            if backend is not None:
+                compact = backend.added(todo) or compact
+            count += 1
+        if compact:
+            self.compact()
+        return count
+
+    def _unindex(self, todo_id):
+        """Drop a todo from every index and return it, or None if there is none."""
+        todo = self._todos.pop(todo_id, None)
+        if todo is None:
+            return None
+        same_priority = self._by_priority[todo["priority"]]
+        del same_priority[todo_id]
+        if not same_priority:
+            del self._by_priority[todo["priority"]]
+        self._pending.pop(todo_id, None)
+        self._completed.pop(todo_id, None)
+        return todo
+
+    def remove(self, todo_id: int):
+        """Remove a todo by its ID and return it, or None if there is none."""
+        todo = self._unindex(todo_id)
+        if todo is not None and self.backend is not None and self.backend.removed(todo_id):
+            self.compact()
+        return todo
+
+    def remove_many(self, todo_ids):
+        """Remove todos by ID in one pass and return the IDs that were not found."""
+        backend = self.backend
+        compact = False
+        not_found = []
+        for todo_id in todo_ids:
+            if self._unindex(todo_id) is None:
+                not_found.append(todo_id)
+            elif backend is not None:
+                compact = backend.removed(todo_id) or compact
+        if compact:
+            self.compact()
+        return not_found
+
+    def _complete(self, todo):
+        """Mark a todo as completed; True if it was pending."""
+        todo["completed"] = True
+        if self._pending.pop(todo["id"], None) is None:
+            return False
+        self._add_completed(todo)
+        return True
+
+    def _add_completed(self, todo):
+        """Add a todo to the completed index, noting if it breaks the ID order."""
+        todo_id = todo["id"]
+        self._completed[todo_id] = todo
+        if todo_id < self._completed_last:
+            # Completed out of ID order: list("completed") re-sorts once
+            self._completed_sorted = False
+        else:
+            self._completed_last = todo_id
+
+    def mark_completed(self, todo_id: int):
+        """Mark a todo as completed by its ID and return it, or None if there is none."""
+        todo = self._todos.get(todo_id)
+        if todo is None:
+            return None
+        if self._complete(todo) and self.backend is not None and self.backend.completed(todo_id):
+            self.compact()
+        return todo
+
+    def mark_completed_many(self, todo_ids):
+        """Mark todos as completed by ID in one pass and return the IDs that were not found."""
+        backend = self.backend
+        compact = False
+        not_found = []
+        for todo_id in todo_ids:
+            todo = self._todos.get(todo_id)
+            if todo is None:
+                not_found.append(todo_id)
+            elif self._complete(todo) and backend is not None:
+                compact = backend.completed(todo_id) or compact
+        if compact:
+            self.compact()
+        return not_found
+
+    def list(self, filter_by: str = "all"):
+        """Todos in the order they were added. Filter can be 'all', 'completed', or 'pending'."""
+        if filter_by == "completed":
+            if not self._completed_sorted:
+                # IDs grow with every add, so ID order is the order they were added
+                self._completed = {todo_id: self._completed[todo_id] for todo_id in sorted(self._completed)}
+                self._completed_sorted = True
+            return list(self._completed.values())
+        if filter_by == "pending":
+            return list(self._pending.values())
+        return list(self._todos.values())
+
+    def by_priority(self, priority: str):
+        """Todos with the given priority, in the order they were added."""
+        return list(self._by_priority.get(priority, {}).values())
+
+    def clear(self):
+        """Remove every todo (their IDs are still not given out again)."""
+        self._reset()
+        if self.backend is not None:
+            self.backend.cleared()
+            self.compact()
+
+    def compact(self):
+        """Have the backend replace its saved history with the current todos."""
+        if self.backend is not None:
+            self.backend.compact(self._todos.values(), self.ids.last)
+
+    def close(self):
+        """Save any pending changes and close the backend."""
+        if self.backend is not None:
+            self.backend.close()
+
+
+todos = TodoStore()
 
 def add_todo(task: str, priority: str = "medium"):
     """Add a new todo item with task and priority."""
-    todo = {
-        "id": len(todos) + 1,
-        "task": task,
-        "priority": priority,
-        "completed": False
-    }
-    todos.append(todo)
+    todos.add(task, priority)
     print(f"Added todo: {task}")
 
 def remove_todo(todo_id: int):
     """Remove a todo by its ID."""
-    # Let Copilot implement this
-    todos[:] = [todo for todo in todos if todo["id"] != todo_id]
+    todos.remove(todo_id)
     print(f"Removed todo with ID: {todo_id}")
 
 def mark_completed(todo_id: int):
     """Mark a todo as completed by its ID."""
-    for todo in todos:
-        if todo["id"] == todo_id:
-            todo["completed"] = True
-            print(f"Marked todo as completed: {todo['task']}")
-            break
+    todo = todos.mark_completed(todo_id)
+    if todo is not None:
+        print(f"Marked todo as completed: {todo['task']}")
     else:
         print(f"Todo with ID {todo_id} not found.")
 
 
+def _pairs(tasks, priority):
+    """(task, priority) pairs from task strings and/or pairs."""
+    for item in tasks:
+        yield (item, priority) if isinstance(item, str) else item
+
+
+def add_todos(tasks, priority: str = "medium", verbose: bool = False):
+    """Add many todos at once. Tasks can be strings (given priority) or (task, priority) pairs."""
+    added = todos.add_many(_pairs(tasks, priority))
+    if verbose:
+        print(f"Added {added} todos")
+    return {"added": added}
+
+
+def remove_todos(todo_ids, verbose: bool = False):
+    """Remove many todos by ID at once."""
+    todo_ids = list(todo_ids)
+    not_found = todos.remove_many(todo_ids)
+    summary = {"removed": len(todo_ids) - len(not_found), "not_found": not_found}
+    if verbose:
+        print(f"Removed {summary['removed']} todos ({len(not_found)} IDs not found)")
+    return summary
+
+
+def mark_completed_many(todo_ids, verbose: bool = False):
+    """Mark many todos as completed by ID at once."""
+    todo_ids = list(todo_ids)
+    not_found = todos.mark_completed_many(todo_ids)
+    summary = {"completed": len(todo_ids) - len(not_found), "not_found": not_found}
+    if verbose:
+        print(f"Marked {summary['completed']} todos as completed ({len(not_found)} IDs not found)")
+    return summary
+
+
 def list_todos(filter_by: str = "all"):
     """List todos. Filter can be 'all', 'completed', or 'pending'."""
-    filtered_todos = todos
-    if filter_by == "completed":
-        filtered_todos = [todo for todo in todos if todo["completed"]]
-    elif filter_by == "pending":
-        filtered_todos = [todo for todo in todos if not todo["completed"]]
-
-    for todo in filtered_todos:
+    for todo in todos.list(filter_by):
         status = "✓" if todo["completed"] else "✗"
         print(f"[{status}] {todo['task']} (ID: {todo['id']}, Priority: {todo['priority']})")
 
 
 def get_todos_by_priority(priority: str):
     """Get all todos with specified priority."""
-    return [todo for todo in todos if todo["priority"] == priority]
+    return todos.by_priority(priority)
 
 
 # Example usage
@@ -0,0 +1,339 @@
+"""
+Benchmark suite for the grade processing functions.
+
+Each benchmark is timed with time.perf_counter after warmup calls, with the
+loop count calibrated so one sample lasts at least min_time seconds, and
+repeated to report the best, median and spread. Benchmarks are swept over
+dataset sizes and mixes:
+
+- numeric:   floats in 0-100
+- letter:    letter grades with +/- modifiers, some in lower case or padded
+- dirty:     numbers, numeric strings, letters, None, "", junk and out-of-range values
+- identical: the same grade repeated (the IDENTICAL_VALUES path)
+
+Datasets come from grade_datagen, with scores drawn from a realistic
+distribution (normal by default, see --distribution).
+
+Results can be written as JSON and compared against a stored baseline to
+catch regressions.
+
+Usage:
+    python benchmarks.py --quick
+    python benchmarks.py --output results.json --save-baseline
+    python benchmarks.py --baseline benchmarks_baseline.json --threshold 0.15
+    python benchmarks.py --quick --profile grades_trace.json
+"""
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+
+from chat_and_code_explain import (
+    calculate_grade_distribution, convert_to_numeric_grade, np, process_grades,
+    process_grades_optimized, process_grades_vectorized
+)
+from grade_datagen import DIRTY_MIX, DISTRIBUTIONS, generate_grades
+from grade_profiling import format_profile, profile_grades
+
+DEFAULT_SIZES = (100, 10_000, 1_000_000)
+QUICK_SIZES = (100, 10_000)
+DATASET_MIXES = ('numeric', 'letter', 'dirty', 'identical')
+BASELINE_PATH = 'benchmarks_baseline.json'
+
+
+def make_dataset(mix, size, seed=0, distribution='normal'):
+    """
+    Build a reproducible grade list for a benchmark with grade_datagen.
+
+    Args:
+        mix (str): One of DATASET_MIXES
+        size (int): Number of grades
+        seed (int): Random seed
+        distribution (str): Score distribution ('normal', 'bimodal', 'skewed', 'uniform')
+
+    Returns:
+        list: The grades
+    """
+    if mix == 'numeric':
+        return generate_grades(size, seed, distribution, mix={'numeric': 1})
+    if mix == 'letter':
+        return generate_grades(size, seed, distribution, mix={'letter': 1}, letter_variants=0.2)
+    if mix == 'dirty':
+        return generate_grades(size, seed, distribution, mix=DIRTY_MIX, numeric_strings=0.2)
+    if mix == 'identical':
+        return [85] * size
+    raise ValueError(f'Unknown dataset mix {mix!r}, use one of {DATASET_MIXES}')
+
+
+def _convert_all(grades):
+    for grade in grades:
+        convert_to_numeric_grade(grade)
+
+
+def _valid_grades(grades):
+    return [numeric_grade for grade in grades
+            if (numeric_grade := convert_to_numeric_grade(grade)) is not None]
+
+
+# name -> (function, prepare) where prepare turns the dataset into the call arguments.
+# max_students=None so large datasets are graded instead of rejected as TOO_MANY_STUDENTS.
+BENCHMARKS = {
+    'process_grades': (process_grades, lambda grades: (grades, None)),
+    'process_grades_optimized': (process_grades_optimized, lambda grades: (grades,)),
+    'convert_to_numeric_grade': (_convert_all, lambda grades: (grades,)),
+    'calculate_grade_distribution': (calculate_grade_distribution, lambda grades: (_valid_grades(grades),)),
+}
+if np is not None:
+    BENCHMARKS['process_grades_vectorized'] = (process_grades_vectorized, lambda grades: (grades, None))
+
+
+def time_call(func, args=(), warmup=1, repeat=5, min_time=0.05):
+    """
+    Time a function call.
+
+    Args:
+        func (callable): Function to time
+        args (tuple): Positional arguments for the call
+        warmup (int): Untimed calls before measuring (fills caches)
+        repeat (int): Number of timed samples
+        min_time (float): Minimum duration of one sample; the call is looped
+            until a sample lasts at least this long
+
+    Returns:
+        dict: loops per sample and best, median, mean and stdev seconds per call
+    """
+    for _ in range(warmup):
+        func(*args)
+
+    def sample(loops):
+        start_time = time.perf_counter()
+        for _ in range(loops):
+            func(*args)
+        return time.perf_counter() - start_time
+
+    # Same gc handling as timeit, collections would land in random samples
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        loops = 1
+        while True:
+            elapsed = sample(loops)
+            if elapsed >= min_time:
+                break
+            loops = max(loops * 2, int(loops * min_time / elapsed * 1.1) if elapsed > 0 else loops * 10)
+        samples = [elapsed / loops] + [sample(loops) / loops for _ in range(repeat - 1)]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {
+        'loops': loops,
+        'repeat': len(samples),
+        'best': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, mixes=DATASET_MIXES, names=None, warmup=1, repeat=5,
+                   min_time=0.05, dataset=make_dataset, progress=None):
+    """
+    Run every benchmark on every (size, mix) dataset.
+
+    Args:
+        sizes (iterable): Dataset sizes
+        mixes (iterable): Dataset mixes
+        names (iterable): Benchmarks to run (default: all of BENCHMARKS)
+        warmup (int): Untimed calls before each measurement
+        repeat (int): Timed samples per measurement
+        min_time (float): Minimum duration of one sample
+        dataset (callable): dataset(mix, size) returning the grades
+        progress (callable): Called with each result as it is measured
+
+    Returns:
+        list: One dict per measurement with benchmark, size, mix, the
+        time_call statistics and items_per_sec
+    """
+    results = []
+    for size in sizes:
+        for mix in mixes:
+            grades = dataset(mix, size)
+            for name in names or BENCHMARKS:
+                func, prepare = BENCHMARKS[name]
+                timing = time_call(func, prepare(grades), warmup, repeat, min_time)
+                result = {'benchmark': name, 'size': size, 'mix': mix, **timing,
+                          'items_per_sec': size / timing['median'] if timing['median'] > 0 else 0.0}
+                results.append(result)
+                if progress:
+                    progress(result)
+    return results
+
+
+def environment_info():
+    """
+    Describe the machine the benchmarks ran on.
+
+    Returns:
+        dict: Python, platform and NumPy versions plus a timestamp
+    """
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'numpy': np.__version__ if np is not None else None,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def save_results(path, results):
+    """Write results and environment info as JSON."""
+    with open(path, 'w', encoding='utf-8') as results_file:
+        json.dump({'environment': environment_info(), 'results': results}, results_file, indent=2)
+
+
+def load_results(path):
+    """Read results written by save_results."""
+    with open(path, encoding='utf-8') as results_file:
+        return json.load(results_file)['results']
+
+
+def compare_to_baseline(results, baseline, threshold=0.10):
+    """
+    Compare median times with a baseline run.
+
+    Args:
+        results (list): Current results from run_benchmarks
+        baseline (list): Baseline results from run_benchmarks
+        threshold (float): Relative slowdown reported as a regression
+
+    Returns:
+        list: One dict per measurement present in both runs with benchmark,
+        size, mix, baseline and current medians, ratio (current / baseline)
+        and status ('regression', 'improvement' or 'ok')
+    """
+    baseline_medians = {(entry['benchmark'], entry['size'], entry['mix']): entry['median']
+                        for entry in baseline}
+    comparison = []
+    for entry in results:
+        key = (entry['benchmark'], entry['size'], entry['mix'])
+        if key not in baseline_medians or baseline_medians[key] <= 0:
+            continue
+        ratio = entry['median'] / baseline_medians[key]
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 / (1 + threshold):
+            status = 'improvement'
+        else:
+            status = 'ok'
+        comparison.append({'benchmark': key[0], 'size': key[1], 'mix': key[2],
+                           'baseline': baseline_medians[key], 'current': entry['median'],
+                           'ratio': ratio, 'status': status})
+    return comparison
+
+
+def speedups(results, name, reference):
+    """
+    Speedup of one benchmark over another on each dataset.
+
+    Args:
+        results (list): Results from run_benchmarks
+        name (str): Benchmark being evaluated
+        reference (str): Benchmark it is compared with
+
+    Returns:
+        dict: (size, mix) -> reference median / name median
+    """
+    medians = {(entry['benchmark'], entry['size'], entry['mix']): entry['median'] for entry in results}
+    return {(size, mix): medians[(reference, size, mix)] / median
+            for (benchmark, size, mix), median in medians.items()
+            if benchmark == name and (reference, size, mix) in medians and median > 0}
+
+
+def format_time(seconds):
+    """Format a duration with a readable unit."""
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:7.2f} {unit}'
+    return f'{seconds / 1e-9:7.2f} ns'
+
+
+def format_result(result):
+    """One table row for a result."""
+    spread = result['stdev'] / result['median'] * 100 if result['median'] else 0.0
+    return (f"{result['benchmark']:<30} {result['size']:>10,} {result['mix']:<10} "
+            f"{format_time(result['median'])} ±{spread:4.1f}%  {result['items_per_sec']:>14,.0f} items/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the grade processing functions')
+    parser.add_argument('--sizes', type=int, nargs='+', help=f'dataset sizes (default: {DEFAULT_SIZES})')
+    parser.add_argument('--mixes', nargs='+', choices=DATASET_MIXES, default=list(DATASET_MIXES))
+    parser.add_argument('--benchmarks', nargs='+', choices=sorted(BENCHMARKS), help='default: all')
+    parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='normal')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--quick', action='store_true', help=f'sizes {QUICK_SIZES}, fewer repeats')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--min-time', type=float, default=0.05)
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='compare with results saved earlier')
+    parser.add_argument('--save-baseline', nargs='?', const=BASELINE_PATH, metavar='PATH',
+                        help=f'store these results as the baseline (default: {BASELINE_PATH})')
+    parser.add_argument('--threshold', type=float, default=0.10, help='regression threshold (0.10 = 10%%)')
+    parser.add_argument('--profile', metavar='TRACE',
+                        help='also profile process_grades stages once per dataset and write a Chrome trace')
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    repeat = 3 if args.quick else args.repeat
+    min_time = 0.02 if args.quick else args.min_time
+
+    print(f"{'benchmark':<30} {'size':>10} {'mix':<10} {'median':>10}  {'spread':>6} {'throughput':>22}")
+    dataset = lambda mix, size: make_dataset(mix, size, args.seed, args.distribution)
+    results = run_benchmarks(sizes, args.mixes, args.benchmarks, args.warmup, repeat, min_time, dataset,
+                             progress=lambda result: print(format_result(result), flush=True))
+
+    if args.benchmarks is None or {'process_grades', 'process_grades_optimized'} <= set(args.benchmarks):
+        print('\nprocess_grades_optimized speedup over process_grades:')
+        for (size, mix), speedup in speedups(results, 'process_grades_optimized', 'process_grades').items():
+            print(f'  {size:>10,} {mix:<10} {speedup:5.2f}x')
+
+    if args.profile:
+        # Separate from the timed runs, so profiling never skews the measurements
+        with profile_grades() as profiler:
+            for size in sizes:
+                for mix in args.mixes:
+                    process_grades(dataset(mix, size), max_students=None)
+        print('\nprocess_grades stages:')
+        print(format_profile(profiler.to_dict()))
+        profiler.save_chrome_trace(args.profile)
+        print(f'Chrome trace written to {args.profile}')
+
+    if args.output:
+        save_results(args.output, results)
+        print(f'\nResults written to {args.output}')
+    if args.save_baseline:
+        save_results(args.save_baseline, results)
+        print(f'Baseline written to {args.save_baseline}')
+
+    if args.baseline:
+        comparison = compare_to_baseline(results, load_results(args.baseline), args.threshold)
+        regressions = [entry for entry in comparison if entry['status'] == 'regression']
+        print(f'\nCompared with {args.baseline}: {len(comparison)} measurements, '
+              f'{len(regressions)} regression(s)')
+        for entry in comparison:
+            if entry['status'] != 'ok':
+                print(f"  {entry['status']:<11} {entry['benchmark']:<30} {entry['size']:>10,} "
+                      f"{entry['mix']:<10} {entry['ratio']:5.2f}x baseline time")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
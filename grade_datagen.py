@@ -0,0 +1,329 @@
+"""
+Seeded synthetic grade data for benchmarks and stress tests.
+
+Grades are drawn from a realistic score distribution (normal, bimodal,
+skewed or uniform) and then written the way real exports contain them: mostly
+numbers, some letter grades matching the score, and a configurable share of
+junk, missing (None) and empty ("") entries.
+
+Rows are generated in fixed blocks, each seeded from (seed, block index), so
+the same seed always produces the same rows however they are consumed: as a
+list, a NumPy array, in chunks, or streamed to a file of up to 100M+ rows.
+Generation uses NumPy when it is installed and the random module otherwise;
+each backend is reproducible on its own but they produce different rows.
+
+Example:
+    grades = generate_grades(10_000, seed=7, distribution='bimodal',
+                             mix={'numeric': 0.8, 'letter': 0.1, 'invalid': 0.05,
+                                  'none': 0.03, 'empty': 0.02})
+    write_grade_dataset('grades.csv', 100_000_000, seed=7)
+"""
+
+import csv
+import random
+from array import array
+
+from chat_and_code_explain import LETTER_GRADE_VALUES, classify_grade_token, np
+
+DISTRIBUTIONS = ('normal', 'bimodal', 'skewed', 'uniform')
+
+# Kinds of entry, in the order of their mix ratios
+ENTRY_KINDS = ('numeric', 'letter', 'invalid', 'none', 'empty')
+DEFAULT_MIX = {'numeric': 0.85, 'letter': 0.10, 'invalid': 0.02, 'none': 0.02, 'empty': 0.01}
+# A badly kept export, for stress tests
+DIRTY_MIX = {'numeric': 0.60, 'letter': 0.20, 'invalid': 0.10, 'none': 0.05, 'empty': 0.05}
+
+# Junk seen in real exports; the numbers are out of range. Words starting with
+# A-F are avoided because letter_to_numeric_grade reads them as letter grades.
+INVALID_TOKENS = ('N/A', 'missing', 'INC', 'TBD', 'W', '8O', 'pass', 'E', 105, -5, 250.0, '1000')
+INVALID_VALUES = tuple(float(token) if classify_grade_token(token) == 'numeric' else float('nan')
+                       for token in INVALID_TOKENS)
+
+# Letter grades sorted by value, and the midpoints between neighbours, to
+# pick the letter closest to a score
+LETTER_FORMS = tuple(sorted(LETTER_GRADE_VALUES, key=LETTER_GRADE_VALUES.get))
+LETTER_FORM_VALUES = tuple(LETTER_GRADE_VALUES[form] for form in LETTER_FORMS)
+LETTER_CUTS = tuple((low + high) / 2 for low, high in zip(LETTER_FORM_VALUES, LETTER_FORM_VALUES[1:]))
+
+# Rows per independently seeded block
+BLOCK_SIZE = 65536
+
+
+class GradeGenerator:
+    """Reproducible generator of realistic grade lists."""
+
+    def __init__(self, seed=0, distribution='normal', mix=None, mean=76.0, std=12.0,
+                 second_mean=45.0, second_std=10.0, second_weight=0.3, decimals=1,
+                 numeric_strings=0.0, letter_variants=0.1):
+        """
+        Args:
+            seed (int): Random seed
+            distribution (str): 'normal', 'bimodal', 'skewed' (long tail of low
+                scores) or 'uniform'
+            mix (dict): Share of each entry kind ('numeric', 'letter',
+                'invalid', 'none', 'empty'); missing kinds are 0, the shares
+                are normalized (default: DEFAULT_MIX)
+            mean (float): Mean score (of the main group for 'bimodal')
+            std (float): Score standard deviation ('normal', 'bimodal')
+            second_mean (float): Mean of the second group ('bimodal')
+            second_std (float): Standard deviation of the second group ('bimodal')
+            second_weight (float): Share of students in the second group ('bimodal')
+            decimals (int): Decimals numeric grades are rounded to (0 gives ints)
+            numeric_strings (float): Share of numeric grades written as strings
+            letter_variants (float): Share of letter grades in lower case or
+                padded with whitespace
+        """
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f'Unknown distribution {distribution!r}, use one of {DISTRIBUTIONS}')
+        mix = DEFAULT_MIX if mix is None else mix
+        unknown = set(mix) - set(ENTRY_KINDS)
+        if unknown:
+            raise ValueError(f'Unknown entry kinds {sorted(unknown)}, use {ENTRY_KINDS}')
+        total = sum(mix.values())
+        if total <= 0 or min(mix.values()) < 0:
+            raise ValueError('Mix ratios must be non-negative and not all zero')
+
+        self.seed = seed
+        self.distribution = distribution
+        self.mix = {kind: mix.get(kind, 0) / total for kind in ENTRY_KINDS}
+        self.mean = mean
+        self.std = std
+        self.second_mean = second_mean
+        self.second_std = second_std
+        self.second_weight = second_weight
+        self.decimals = decimals
+        self.numeric_strings = numeric_strings
+        self.letter_variants = letter_variants
+
+        # Cumulative kind probabilities for the random module backend
+        self._kind_cuts = []
+        cumulative = 0.0
+        for kind in ENTRY_KINDS:
+            cumulative += self.mix[kind]
+            self._kind_cuts.append(cumulative)
+
+    def _numpy_block(self, index, size):
+        """Draw one block with NumPy: scores, kinds, letter/junk choices and styling flags."""
+        rng = np.random.default_rng([self.seed, index])
+        if self.distribution == 'normal':
+            scores = rng.normal(self.mean, self.std, size)
+        elif self.distribution == 'bimodal':
+            second = rng.random(size) < self.second_weight
+            scores = np.where(second, rng.normal(self.second_mean, self.second_std, size),
+                              rng.normal(self.mean, self.std, size))
+        elif self.distribution == 'skewed':
+            # Long tail towards low scores, mean at self.mean
+            scores = 100.0 - rng.gamma(2.0, max(100.0 - self.mean, 0.0) / 2.0, size)
+        else:
+            scores = rng.uniform(0.0, 100.0, size)
+        scores = np.round(np.clip(scores, 0.0, 100.0), self.decimals)
+
+        kinds = rng.choice(len(ENTRY_KINDS), size=size, p=[self.mix[kind] for kind in ENTRY_KINDS])
+        letters = np.searchsorted(LETTER_CUTS, scores)
+        junk = rng.integers(0, len(INVALID_TOKENS), size)
+        styled = rng.random(size)
+        return scores, kinds, letters, junk, styled
+
+    def _python_block(self, index, size):
+        """Draw one block with the random module (same layout as _numpy_block, as lists)."""
+        rng = random.Random(f'{self.seed}:{index}')
+        scores, kinds, letters, junk, styled = [], [], [], [], []
+        for _ in range(size):
+            if self.distribution == 'normal':
+                score = rng.gauss(self.mean, self.std)
+            elif self.distribution == 'bimodal':
+                if rng.random() < self.second_weight:
+                    score = rng.gauss(self.second_mean, self.second_std)
+                else:
+                    score = rng.gauss(self.mean, self.std)
+            elif self.distribution == 'skewed':
+                score = 100.0 - rng.gammavariate(2.0, max(100.0 - self.mean, 0.0) / 2.0)
+            else:
+                score = rng.uniform(0.0, 100.0)
+            score = round(min(max(score, 0.0), 100.0), self.decimals)
+
+            draw = rng.random()
+            kind = next((kind for kind, cut in enumerate(self._kind_cuts) if draw < cut), 0)
+            scores.append(score)
+            kinds.append(kind)
+            letters.append(sum(score > cut for cut in LETTER_CUTS))
+            junk.append(rng.randrange(len(INVALID_TOKENS)))
+            styled.append(rng.random())
+        return scores, kinds, letters, junk, styled
+
+    def _iter_blocks(self, rows):
+        """Yield the drawn blocks covering rows."""
+        draw = self._numpy_block if np is not None else self._python_block
+        for index, start in enumerate(range(0, rows, BLOCK_SIZE)):
+            yield draw(index, min(BLOCK_SIZE, rows - start))
+
+    def _block_grades(self, block):
+        """Turn one drawn block into a list of grades."""
+        scores, kinds, letters, junk, styled = block
+        if np is not None:
+            grades = scores.astype(np.int64).tolist() if self.decimals == 0 else scores.tolist()
+            special = np.flatnonzero(kinds != 0).tolist()
+            if self.numeric_strings:
+                special += np.flatnonzero((kinds == 0) & (styled < self.numeric_strings)).tolist()
+            kinds, letters, junk, styled = kinds.tolist(), letters.tolist(), junk.tolist(), styled.tolist()
+        else:
+            grades = [int(score) for score in scores] if self.decimals == 0 else list(scores)
+            special = [position for position, kind in enumerate(kinds)
+                       if kind != 0 or styled[position] < self.numeric_strings]
+
+        for position in special:
+            kind = kinds[position]
+            if kind == 0:
+                grades[position] = str(grades[position])
+            elif kind == 1:
+                letter = LETTER_FORMS[letters[position]]
+                if styled[position] < self.letter_variants / 2:
+                    letter = letter.lower()
+                elif styled[position] < self.letter_variants:
+                    letter = f' {letter} '
+                grades[position] = letter
+            elif kind == 2:
+                grades[position] = INVALID_TOKENS[junk[position]]
+            elif kind == 3:
+                grades[position] = None
+            else:
+                grades[position] = ''
+        return grades
+
+    def _block_values(self, block):
+        """Turn one drawn block into numeric values (what convert_to_numeric_grade would give)."""
+        scores, kinds, letters, junk, _ = block
+        if np is not None:
+            values = np.asarray(scores, dtype=np.float64).copy()
+            letter_rows = kinds == 1
+            values[letter_rows] = np.asarray(LETTER_FORM_VALUES)[letters[letter_rows]]
+            invalid_rows = kinds == 2
+            values[invalid_rows] = np.asarray(INVALID_VALUES)[junk[invalid_rows]]
+            values[kinds >= 3] = np.nan
+            return values
+
+        nan = float('nan')
+        return array('d', (score if kind == 0 else LETTER_FORM_VALUES[letter] if kind == 1
+                           else INVALID_VALUES[junk_id] if kind == 2 else nan
+                           for score, kind, letter, junk_id in zip(scores, kinds, letters, junk)))
+
+    def iter_chunks(self, rows, chunk_size=BLOCK_SIZE):
+        """
+        Generate grades in chunks.
+
+        Args:
+            rows (int): Total number of grades
+            chunk_size (int): Grades per chunk (the last one may be shorter)
+
+        Yields:
+            list: The next chunk of grades
+        """
+        pending = []
+        for block in self._iter_blocks(rows):
+            pending.extend(self._block_grades(block))
+            while len(pending) >= chunk_size:
+                yield pending[:chunk_size]
+                del pending[:chunk_size]
+        if pending:
+            yield pending
+
+    def grades(self, rows):
+        """
+        Generate a list of grades.
+
+        Args:
+            rows (int): Number of grades
+
+        Returns:
+            list: Grades in the mix of formats accepted by process_grades
+        """
+        grades = []
+        for block in self._iter_blocks(rows):
+            grades.extend(self._block_grades(block))
+        return grades
+
+    def values(self, rows):
+        """
+        Generate the numeric form of the same grades as grades(rows).
+
+        Letters are converted to their value, junk and missing entries are NaN
+        and out-of-range numbers keep their value, matching what
+        convert_to_numeric_grade and the vectorized engine see.
+
+        Args:
+            rows (int): Number of grades
+
+        Returns:
+            numpy.ndarray: float64 values (array.array('d') without NumPy)
+        """
+        blocks = [self._block_values(block) for block in self._iter_blocks(rows)]
+        if np is not None:
+            return np.concatenate(blocks) if blocks else np.empty(0)
+        values = array('d')
+        for block in blocks:
+            values.extend(block)
+        return values
+
+
+def generate_grades(rows, seed=0, distribution='normal', mix=None, **options):
+    """
+    Generate a reproducible list of realistic grades.
+
+    Args:
+        rows (int): Number of grades
+        seed (int): Random seed
+        distribution (str): 'normal', 'bimodal', 'skewed' or 'uniform'
+        mix (dict): Share of 'numeric', 'letter', 'invalid', 'none' and 'empty' entries
+        **options: Further GradeGenerator settings (mean, std, decimals, ...)
+
+    Returns:
+        list: The grades
+    """
+    return GradeGenerator(seed, distribution, mix, **options).grades(rows)
+
+
+def generate_grade_array(rows, seed=0, distribution='normal', mix=None, **options):
+    """
+    Generate the numeric values of generate_grades(rows, ...) with the same arguments.
+
+    Returns:
+        numpy.ndarray: float64 values, NaN for junk and missing entries
+    """
+    return GradeGenerator(seed, distribution, mix, **options).values(rows)
+
+
+def write_grade_dataset(path, rows, file_format='csv', seed=0, distribution='normal', mix=None,
+                        chunk_size=BLOCK_SIZE, **options):
+    """
+    Stream generated grades to a file without holding them all in memory.
+
+    Args:
+        path (str): File to write
+        rows (int): Number of grades
+        file_format (str): 'csv' (one grade per row, missing grades as empty
+            rows) or 'columns' (grade_io binary grade columns)
+        seed (int): Random seed
+        distribution (str): 'normal', 'bimodal', 'skewed' or 'uniform'
+        mix (dict): Share of 'numeric', 'letter', 'invalid', 'none' and 'empty' entries
+        chunk_size (int): Grades generated and written at a time
+        **options: Further GradeGenerator settings
+
+    Returns:
+        int: Number of rows written
+    """
+    generator = GradeGenerator(seed, distribution, mix, **options)
+    if file_format == 'columns':
+        from grade_io import write_grade_columns
+        return write_grade_columns(
+            path, (grade for chunk in generator.iter_chunks(rows, chunk_size) for grade in chunk),
+            chunk_size=chunk_size
+        )
+    if file_format != 'csv':
+        raise ValueError(f"Unknown file format {file_format!r}, use 'csv' or 'columns'")
+
+    with open(path, 'w', newline='', encoding='utf-8') as grade_file:
+        writer = csv.writer(grade_file)
+        for chunk in generator.iter_chunks(rows, chunk_size):
+            # A None grade becomes an empty row, which the CSV reader turns back into None
+            writer.writerows([] if grade is None else [grade] for grade in chunk)
+    return rows
@@ -0,0 +1,554 @@
+"""
+Chunked file ingestion for the grade pipeline.
+
+Grade exports are read in fixed-size chunks and fed to a GradeAccumulator, so
+multi-GB files never have to be materialized as one Python list. Two input
+formats are supported:
+
+- CSV: one grade per row (or one column of a wider export), read in chunks
+- Grade columns: a compact binary format holding grades already normalized
+  by convert_to_numeric_grade (numeric values, invalid codes and a
+  dictionary of the original tokens), opened zero-copy with numpy.memmap
+  (or mmap + memoryview when NumPy is not installed)
+
+Example:
+    result, report = process_grade_file('grades.csv', column='grade', header=True)
+    print(f"{report['rows_per_sec']:,.0f} rows/sec")
+"""
+
+import csv
+import json
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import time
+from array import array
+from decimal import Decimal
+from fractions import Fraction
+
+import grade_metrics
+from chat_and_code_explain import (
+    INVALID_GRADE_CODES, GradeAccumulator, classify_grade_token, convert_to_numeric_grade,
+    distribution_from_counts, invalid_grade_code, np
+)
+from grade_profiling import ACTIVE_PROFILER, active_stage
+
+# Rows per chunk handed to the accumulator
+DEFAULT_CHUNK_SIZE = 65536
+
+# Grade column files: magic, then a fixed-size JSON header, then 64-byte aligned columns
+GRADE_COLUMNS_MAGIC = b'GRADECOL'
+GRADE_COLUMNS_VERSION = 3
+HEADER_SIZE = 4096
+COLUMN_ALIGNMENT = 64
+
+# array typecode for each supported value dtype, and for every column dtype
+VALUE_TYPECODES = {'<f8': 'd', '<f4': 'f'}
+COLUMN_TYPECODES = {**VALUE_TYPECODES, '|u1': 'B', '<u4': 'I'}
+
+# Token dictionary size limit, and the token id of rows left out of it
+DEFAULT_MAX_TOKENS = 65536
+NO_TOKEN = 0xFFFFFFFF
+# Values of the codes column for missing (None) and empty ('') grades
+MISSING_GRADE_CODE = INVALID_GRADE_CODES.index('MISSING_GRADE') + 1
+EMPTY_GRADE_CODE = INVALID_GRADE_CODES.index('EMPTY_GRADE') + 1
+
+# Token types JSON keeps as they are
+JSON_TOKEN_TYPES = (type(None), bool, int, float, str)
+# Other token types, stored as {"kind": kind, "text": text}: kind -> (type, to text, from text).
+# NumPy scalars are stored as {"kind": "numpy", "dtype": dtype, "value": Python value}.
+TAGGED_TOKEN_KINDS = {
+    'decimal': (Decimal, str, Decimal),
+    'fraction': (Fraction, str, Fraction),
+    'bytes': (bytes, bytes.hex, bytes.fromhex),
+    'bytearray': (bytearray, bytearray.hex, bytearray.fromhex),
+}
+
+
+def iter_csv_grade_chunks(path, column=0, header=False, chunk_size=DEFAULT_CHUNK_SIZE,
+                          delimiter=','):
+    """
+    Read one column of a CSV file in chunks of grade tokens.
+
+    Args:
+        path (str): CSV file to read
+        column (int or str): Column index, or column name when header is True
+        header (bool): Whether the first row holds column names
+        chunk_size (int): Maximum number of rows per chunk
+        delimiter (str): Field delimiter
+
+    Yields:
+        list: Grade tokens as strings; rows without the column yield None
+    """
+    with open(path, newline='', encoding='utf-8') as grade_file:
+        yield from csv_grade_chunks(grade_file, column, header, chunk_size, delimiter)
+
+
+def csv_grade_chunks(lines, column=0, header=False, chunk_size=DEFAULT_CHUNK_SIZE, delimiter=','):
+    """
+    Read one column of CSV text in chunks of grade tokens.
+
+    Args:
+        lines (iterable): Lines of CSV text, e.g. an open file or str.splitlines()
+        column (int or str): Column index, or column name when header is True
+        header (bool): Whether the first row holds column names
+        chunk_size (int): Maximum number of rows per chunk
+        delimiter (str): Field delimiter
+
+    Yields:
+        list: Grade tokens as strings; rows without the column yield None
+    """
+    reader = csv.reader(lines, delimiter=delimiter)
+
+    if header:
+        names = next(reader, [])
+        if isinstance(column, str):
+            if column not in names:
+                raise ValueError(f'Column {column!r} not found in CSV header')
+            column = names.index(column)
+    elif isinstance(column, str):
+        raise ValueError('Column names require header=True')
+
+    chunk = []
+    for row in reader:
+        chunk.append(row[column] if len(row) > column else None)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _pad_to_alignment(grade_file):
+    """Pad the file with zero bytes up to the next column boundary."""
+    padding = -grade_file.tell() % COLUMN_ALIGNMENT
+    grade_file.write(b'\0' * padding)
+
+
+def _write_header(grade_file, header):
+    """Write the magic and JSON header into the reserved header block."""
+    encoded = json.dumps(header).encode('utf-8')
+    if len(GRADE_COLUMNS_MAGIC) + 8 + len(encoded) > HEADER_SIZE:
+        raise ValueError('Grade column header does not fit in the header block')
+    grade_file.seek(0)
+    grade_file.write(GRADE_COLUMNS_MAGIC)
+    grade_file.write(len(encoded).to_bytes(8, 'little'))
+    grade_file.write(encoded)
+
+
+def _token_key(token):
+    """Dictionary key that keeps 85, 85.0 and True apart and accepts unhashable grades."""
+    return type(token), repr(token)
+
+
+def _encode_token(token):
+    """JSON form of a token for the token dictionary (see _decode_token)."""
+    token_type = type(token)
+    if token_type in JSON_TOKEN_TYPES:
+        return token
+    if token_type is list:
+        return [_encode_token(item) for item in token]
+    for kind, (kind_type, to_text, _) in TAGGED_TOKEN_KINDS.items():
+        if token_type is kind_type:
+            return {'kind': kind, 'text': to_text(token)}
+    if np is not None and isinstance(token, np.generic):
+        value = token.item()
+        if type(value) in (bool, int, float):
+            return {'kind': 'numpy', 'dtype': token.dtype.str, 'value': value}
+    raise TypeError(f'Cannot store grade {token!r} of type {token_type.__name__} in a grade column file')
+
+
+def _decode_token(item):
+    """Token from its JSON form in the token dictionary."""
+    if isinstance(item, list):
+        return [_decode_token(element) for element in item]
+    if not isinstance(item, dict):
+        return item
+    if item['kind'] == 'numpy':
+        if np is None:
+            raise ValueError('Grade column file holds NumPy grades but NumPy is not installed')
+        return np.dtype(item['dtype']).type(item['value'])
+    return TAGGED_TOKEN_KINDS[item['kind']][2](item['text'])
+
+
+def write_grade_columns(path, grades, dtype='<f8', chunk_size=DEFAULT_CHUNK_SIZE,
+                        max_tokens=DEFAULT_MAX_TOKENS):
+    """
+    Convert grades into a binary grade column file.
+
+    Each grade is normalized once by convert_to_numeric_grade and stored as:
+
+    - values: the numeric grade (numeric tokens that are out of range keep
+      their value, unparseable tokens are NaN)
+    - codes: 0 for valid grades, i + 1 for INVALID_GRADE_CODES[i]
+    - token_ids: index of the original grade in the token dictionary
+
+    The token dictionary lets later runs reproduce process_grades results
+    exactly (reported invalid values, the identical-values warning) without
+    parsing anything. Tokens keep their type: JSON types are stored as they
+    are and Decimal, Fraction, bytes, bytearray and NumPy scalars with a
+    type tag; other types raise TypeError. Once the dictionary holds
+    max_tokens distinct grades, further new grades get NO_TOKEN and are
+    read back as None or '' for missing and empty grades and as their
+    numeric value (NaN if unparseable) otherwise, so only the reported
+    values of new unparseable grades differ from process_grades.
+
+    Example:
+        csv_grades = itertools.chain.from_iterable(iter_csv_grade_chunks('grades.csv'))
+        write_grade_columns('grades.gradecols', csv_grades)
+
+    Args:
+        path (str): File to write
+        grades (iterable): Grades in any format accepted by process_grades
+        dtype (str): '<f8' (float64, exact) or '<f4' (float32, half the size,
+            rounds grades that are not exactly representable)
+        chunk_size (int): Grades converted per chunk (bounds memory use)
+        max_tokens (int): Maximum size of the token dictionary
+
+    Returns:
+        int: Number of rows written
+    """
+    if dtype not in VALUE_TYPECODES:
+        raise ValueError(f'Unsupported value dtype {dtype!r}, use one of {sorted(VALUE_TYPECODES)}')
+    typecode = VALUE_TYPECODES[dtype]
+    nan = float('nan')
+    code_bytes = {code: index + 1 for index, code in enumerate(INVALID_GRADE_CODES)}
+
+    token_ids = {}
+    tokens = []  # JSON forms of the distinct grades (see _encode_token)
+    first_token = None
+    identical = True
+    rows = 0
+
+    with open(path, 'wb') as grade_file, \
+            tempfile.TemporaryFile() as codes_file, tempfile.TemporaryFile() as token_ids_file:
+        grade_file.write(b'\0' * HEADER_SIZE)
+        values_offset = grade_file.tell()
+
+        chunk = []
+        for grade in _iter_with_flush(grades, chunk_size):
+            if grade is not _FLUSH:
+                chunk.append(grade)
+                continue
+
+            values = array(typecode)
+            codes = bytearray()
+            ids = array('I')
+            for token in chunk:
+                numeric_grade = convert_to_numeric_grade(token)
+                if numeric_grade is not None:
+                    values.append(numeric_grade)
+                    codes.append(0)
+                else:
+                    # Keep out-of-range numbers so reports can show them
+                    values.append(float(token) if classify_grade_token(token) == 'numeric' else nan)
+                    codes.append(code_bytes[invalid_grade_code(token)])
+
+                key = _token_key(token)
+                token_id = token_ids.get(key)
+                if token_id is None:
+                    if len(tokens) < max_tokens:
+                        token_id = token_ids[key] = len(tokens)
+                        tokens.append(_encode_token(token))
+                    else:
+                        token_id = NO_TOKEN
+                ids.append(token_id)
+
+                # Same rule as check_suspicious_data, decided once at export time
+                if identical and token is not None:
+                    if first_token is None:
+                        first_token = str(token)
+                    elif str(token) != first_token:
+                        identical = False
+
+            if sys.byteorder == 'big':
+                values.byteswap()
+                ids.byteswap()
+            values.tofile(grade_file)
+            codes_file.write(codes)
+            ids.tofile(token_ids_file)
+            rows += len(chunk)
+            chunk = []
+
+        columns = {'values': {'dtype': dtype, 'offset': values_offset}}
+        for name, column_dtype, column_file in (('codes', '|u1', codes_file),
+                                                ('token_ids', '<u4', token_ids_file)):
+            _pad_to_alignment(grade_file)
+            columns[name] = {'dtype': column_dtype, 'offset': grade_file.tell()}
+            column_file.seek(0)
+            shutil.copyfileobj(column_file, grade_file)
+
+        _pad_to_alignment(grade_file)
+        tokens_offset = grade_file.tell()
+        encoded_tokens = json.dumps(tokens).encode('utf-8')
+        grade_file.write(encoded_tokens)
+
+        _write_header(grade_file, {
+            'format': 'grade-columns',
+            'version': GRADE_COLUMNS_VERSION,
+            'rows': rows,
+            'columns': columns,
+            'tokens': {'offset': tokens_offset, 'length': len(encoded_tokens), 'count': len(tokens)},
+            'identical': identical and first_token is not None,
+        })
+
+    return rows
+
+
+# Marker emitted by _iter_with_flush after every full chunk and at the end
+_FLUSH = object()
+
+
+def _iter_with_flush(grades, chunk_size):
+    """Yield the grades, inserting _FLUSH after every chunk_size items and at the end."""
+    count = 0
+    for grade in grades:
+        yield grade
+        count += 1
+        if count == chunk_size:
+            yield _FLUSH
+            count = 0
+    yield _FLUSH
+
+
+class TokenView:
+    """Original grades for a slice of a grade column file, looked up on access."""
+
+    __slots__ = ('token_ids', 'values', 'codes', 'tokens')
+
+    def __init__(self, token_ids, values, codes, tokens):
+        self.token_ids = token_ids
+        self.values = values
+        self.codes = codes
+        self.tokens = tokens
+
+    def __len__(self):
+        return len(self.token_ids)
+
+    def __getitem__(self, index):
+        token_id = int(self.token_ids[index])
+        if token_id == NO_TOKEN:
+            # Missing and empty grades are always exactly None and ''
+            code = int(self.codes[index])
+            if code == MISSING_GRADE_CODE:
+                return None
+            if code == EMPTY_GRADE_CODE:
+                return ''
+            return float(self.values[index])
+        return self.tokens[token_id]
+
+
+class GradeColumns:
+    """
+    A grade column file opened for zero-copy reading.
+
+    values, codes and token_ids are numpy.memmap arrays (or memoryviews over
+    an mmap when NumPy is not installed) backed by the file, so only the
+    pages a chunk touches are read into memory.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Grade column file written by write_grade_columns
+        """
+        self.path = path
+        with open(path, 'rb') as grade_file:
+            if grade_file.read(len(GRADE_COLUMNS_MAGIC)) != GRADE_COLUMNS_MAGIC:
+                raise ValueError(f'{path} is not a grade column file')
+            header_length = int.from_bytes(grade_file.read(8), 'little')
+            self.header = json.loads(grade_file.read(header_length).decode('utf-8'))
+            if self.header.get('version') != GRADE_COLUMNS_VERSION:
+                raise ValueError(f'Unsupported grade column file version {self.header.get("version")!r}')
+
+            grade_file.seek(self.header['tokens']['offset'])
+            encoded_tokens = json.loads(grade_file.read(self.header['tokens']['length']).decode('utf-8'))
+            self.tokens = [_decode_token(item) for item in encoded_tokens]
+
+        self.rows = self.header['rows']
+        self.identical = self.header['identical']
+        self._mmap = None
+        self.columns = {name: self._open_column(spec) for name, spec in self.header['columns'].items()}
+        self.values = self.columns['values']
+        self.codes = self.columns['codes']
+        self.token_ids = self.columns['token_ids']
+
+    def _open_column(self, spec):
+        """Map one column of the file."""
+        if np is not None:
+            if self.rows == 0:
+                return np.empty(0, dtype=spec['dtype'])
+            return np.memmap(self.path, dtype=spec['dtype'], mode='r',
+                             offset=spec['offset'], shape=(self.rows,))
+
+        if self._mmap is None:
+            with open(self.path, 'rb') as grade_file:
+                self._mmap = mmap.mmap(grade_file.fileno(), 0, access=mmap.ACCESS_READ)
+        typecode = COLUMN_TYPECODES[spec['dtype']]
+        itemsize = array(typecode).itemsize
+        view = memoryview(self._mmap)[spec['offset']:spec['offset'] + self.rows * itemsize]
+        return view.cast(typecode)
+
+    def __len__(self):
+        return self.rows
+
+    def iter_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Iterate over the file in chunks.
+
+        Args:
+            chunk_size (int): Maximum number of rows per chunk
+
+        Yields:
+            tuple: (values, codes, tokens) where values and codes are slices
+            of the mapped columns and tokens is a TokenView of the originals
+        """
+        for start in range(0, self.rows, chunk_size):
+            stop = start + chunk_size
+            values = self.values[start:stop]
+            codes = self.codes[start:stop]
+            yield values, codes, TokenView(self.token_ids[start:stop], values, codes, self.tokens)
+
+    def iter_grades(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Iterate over the original grades.
+
+        Args:
+            chunk_size (int): Rows decoded at a time
+
+        Yields:
+            The original grade of each row (see write_grade_columns for NO_TOKEN rows)
+        """
+        for _, _, tokens in self.iter_chunks(chunk_size):
+            for index in range(len(tokens)):
+                yield tokens[index]
+
+    def letter_counts(self):
+        """
+        Count the valid grades per letter without parsing the original grades.
+
+        Returns:
+            dict: Count for each of A, B, C, D and F
+        """
+        if np is None:
+            accumulator = GradeAccumulator()
+            accumulator.extend(value if code == 0 else None for value, code in zip(self.values, self.codes))
+            return dict(accumulator.letter_counts)
+
+        counts = [0] * 5
+        for values, codes, _ in self.iter_chunks():
+            valid_values = values[codes == 0]
+            letter_index = np.searchsorted(np.array([60.0, 70.0, 80.0, 90.0]), valid_values, side='right')
+            for index, count in enumerate(np.bincount(letter_index, minlength=5).tolist()):
+                counts[index] += count
+        f_count, d_count, c_count, b_count, a_count = counts
+        return {'A': a_count, 'B': b_count, 'C': c_count, 'D': d_count, 'F': f_count}
+
+    def grade_distribution(self):
+        """
+        Calculate the letter grade distribution of the valid grades.
+
+        Returns:
+            dict: Same format as calculate_grade_distribution
+        """
+        letter_counts = self.letter_counts()
+        return distribution_from_counts(letter_counts, sum(letter_counts.values()))
+
+
+def open_grade_columns(path):
+    """
+    Open a grade column file for zero-copy reading.
+
+    Args:
+        path (str): Grade column file written by write_grade_columns
+
+    Returns:
+        GradeColumns: The mapped file
+    """
+    return GradeColumns(path)
+
+
+def detect_grade_file_format(path):
+    """
+    Work out whether a file is CSV or a grade column file.
+
+    Args:
+        path (str): File to inspect
+
+    Returns:
+        str: 'columns' or 'csv'
+    """
+    with open(path, 'rb') as grade_file:
+        if grade_file.read(len(GRADE_COLUMNS_MAGIC)) == GRADE_COLUMNS_MAGIC:
+            return 'columns'
+    return 'csv'
+
+
+def process_grade_file(path, file_format=None, chunk_size=DEFAULT_CHUNK_SIZE, column=0,
+                       header=False, max_students=None, min_students=1, compact=False):
+    """
+    Process a grade file chunk by chunk with bounded memory.
+
+    Args:
+        path (str): CSV or grade column file
+        file_format (str): 'csv' or 'columns' (default: detected from the file)
+        chunk_size (int): Rows per chunk
+        column (int or str): CSV column holding the grades
+        header (bool): Whether the CSV starts with a header row
+        max_students (int): Maximum number of students allowed (default: no limit)
+        min_students (int): Minimum number of students required (default: 1)
+        compact (bool): Return a slotted GradeResult instead of nested dicts
+
+    Returns:
+        tuple: (result, report) where result is the process_grades-shaped
+        dict and report holds rows, chunks, seconds and rows_per_sec
+    """
+    file_format = file_format or detect_grade_file_format(path)
+    accumulator = GradeAccumulator(max_students, min_students)
+    chunks = 0
+    start_time = time.perf_counter()
+    # With a profiler active, reading each chunk and accumulating it are timed separately
+    profiler = ACTIVE_PROFILER.get()
+
+    if file_format == 'csv':
+        reader = iter_csv_grade_chunks(path, column, header, chunk_size)
+        if profiler is not None:
+            reader = profiler.iterate('read_chunk', reader)
+        for chunk in reader:
+            with active_stage('accumulate', len(chunk)):
+                accumulator.extend(chunk)
+            chunks += 1
+    elif file_format == 'columns':
+        columns = open_grade_columns(path)
+        reader = columns.iter_chunks(chunk_size)
+        if profiler is not None:
+            reader = profiler.iterate('read_chunk', reader, size=lambda chunk: len(chunk[0]))
+        for values, codes, tokens in reader:
+            with active_stage('accumulate', len(values)):
+                if np is not None:
+                    accumulator.extend_numeric(values, codes=codes, tokens=tokens)
+                else:
+                    accumulator.extend(tokens[index] for index in range(len(tokens)))
+            chunks += 1
+        # Decided on the original grades when the file was written
+        accumulator.identical = columns.identical
+    else:
+        raise ValueError(f'Unknown grade file format {file_format!r}')
+
+    with active_stage('build_result'):
+        result = accumulator.result(compact)
+    seconds = time.perf_counter() - start_time
+    if grade_metrics.active_sink is not None:
+        grade_metrics.active_sink.observe_call('process_grade_file', seconds, accumulator.total_entries,
+                                               accumulator.invalid_codes, result.get('error_code'))
+    report = {
+        'format': file_format,
+        'rows': accumulator.total_entries,
+        'chunks': chunks,
+        'seconds': seconds,
+        'rows_per_sec': accumulator.total_entries / seconds if seconds > 0 else 0.0,
+        'file_bytes': os.path.getsize(path),
+    }
+    return result, report
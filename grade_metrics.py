@@ -0,0 +1,318 @@
+"""
+Operational metrics for the grade pipeline.
+
+Once a sink is installed with set_metrics_sink(), process_grades,
+process_grades_batch and grade_io.process_grade_file report every call to it:
+latency, number of grades, invalid grades by code and the error code of
+rejected inputs. process_grades_batch also reports its batch size. When no
+sink is installed the cost is one module attribute lookup per call.
+
+Any object with observe_call() and observe_batch() methods can be a sink
+(see MetricsSink). GradeMetrics keeps running counters and histograms in
+per-thread shards, so recording never takes a lock, and exports them in
+the Prometheus text format, to a file (for the node_exporter textfile
+collector) or through grade_server's GET /metrics.
+
+Example:
+    metrics = enable_metrics()
+    process_grades(grades)
+    metrics.write_prometheus('/var/lib/node_exporter/grades.prom')
+"""
+
+import bisect
+import os
+import tempfile
+import threading
+
+# Histogram bucket upper bounds (Prometheus 'le'), plus an implicit +Inf
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+METRIC_PREFIX = 'grades'
+
+# Sink the grade functions report to; None disables metrics (see set_metrics_sink)
+active_sink = None
+
+
+def set_metrics_sink(sink):
+    """
+    Install the sink every grade function call reports to.
+
+    Args:
+        sink (MetricsSink): Sink to install, or None to turn metrics off
+
+    Returns:
+        MetricsSink: The previously installed sink
+    """
+    global active_sink
+    previous, active_sink = active_sink, sink
+    return previous
+
+
+def get_metrics_sink():
+    """Get the installed sink (None when metrics are off)."""
+    return active_sink
+
+
+def enable_metrics():
+    """
+    Install a new GradeMetrics as the metrics sink.
+
+    Returns:
+        GradeMetrics: The installed sink
+    """
+    metrics = GradeMetrics()
+    set_metrics_sink(metrics)
+    return metrics
+
+
+class MetricsSink:
+    """Interface of a metrics sink; the methods of this base class do nothing."""
+
+    def observe_call(self, function, seconds, grades, invalid_codes=None, error_code=None):
+        """
+        Record one call of a grade function.
+
+        Args:
+            function (str): 'process_grades', 'process_grades_batch' or 'process_grade_file'
+            seconds (float): Wall time of the call
+            grades (int): Number of grades handled
+            invalid_codes (dict): Invalid grades per INVALID_GRADE_CODES code
+                (None when the input was rejected before grading)
+            error_code (str): error_code of the result when the input was rejected
+        """
+
+    def observe_batch(self, classes):
+        """
+        Record the size of one process_grades_batch call.
+
+        Args:
+            classes (int): Number of classes in the batch
+        """
+
+
+class _Histogram:
+    """Bucket counts (not cumulative), sum and count of observed values."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        # bisect_left puts value in the first bucket with value <= le
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+
+class _Shard:
+    """Counters written by a single thread."""
+
+    __slots__ = ('calls', 'grades', 'invalid', 'errors', 'latency', 'batch_sizes')
+
+    def __init__(self):
+        self.calls = {}    # function -> calls
+        self.grades = {}   # function -> grades
+        self.invalid = {}  # code -> invalid grades
+        self.errors = {}   # (function, error_code) -> rejected calls
+        self.latency = {}  # function -> _Histogram
+        self.batch_sizes = _Histogram(BATCH_SIZE_BUCKETS)
+
+
+class GradeMetrics(MetricsSink):
+    """
+    Running counters and histograms of grade function calls.
+
+    Each thread writes to its own shard without locking; snapshot() and the
+    exporters add the shards up. Shards of finished threads are kept, so
+    counters never go down.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()  # only guards the list of shards
+
+    def _shard(self):
+        """Get the calling thread's shard, creating it on first use."""
+        shard = _Shard()
+        self._local.shard = shard
+        with self._lock:
+            self._shards.append(shard)
+        return shard
+
+    def observe_call(self, function, seconds, grades, invalid_codes=None, error_code=None):
+        shard = getattr(self._local, 'shard', None) or self._shard()
+        shard.calls[function] = shard.calls.get(function, 0) + 1
+        shard.grades[function] = shard.grades.get(function, 0) + grades
+        if invalid_codes:
+            for code, count in invalid_codes.items():
+                shard.invalid[code] = shard.invalid.get(code, 0) + count
+        if error_code is not None:
+            key = (function, error_code)
+            shard.errors[key] = shard.errors.get(key, 0) + 1
+
+        latency = shard.latency.get(function)
+        if latency is None:
+            latency = shard.latency[function] = _Histogram(LATENCY_BUCKETS)
+        latency.observe(seconds)
+
+    def observe_batch(self, classes):
+        shard = getattr(self._local, 'shard', None) or self._shard()
+        shard.batch_sizes.observe(classes)
+
+    def reset(self):
+        """Drop every shard (and so every counter)."""
+        with self._lock:
+            self._shards = []
+            self._local = threading.local()
+
+    def snapshot(self):
+        """
+        Add up the counters of all threads.
+
+        Returns:
+            dict: calls, grades, invalid (by code) and errors (by function and
+            error code) counters, latency histograms by function, the batch
+            size histogram and the conversion cache hits, misses and size.
+            Histograms are dicts with non-cumulative 'counts' per bucket
+            (the last one is +Inf), 'sum' and 'count'.
+        """
+        from chat_and_code_explain import conversion_cache_info
+
+        with self._lock:
+            shards = list(self._shards)
+
+        calls, grades, invalid, errors, latency = {}, {}, {}, {}, {}
+        batch_sizes = _Histogram(BATCH_SIZE_BUCKETS)
+        for shard in shards:
+            # Copies, since the owning threads keep writing
+            for totals, counters in ((calls, shard.calls), (grades, shard.grades),
+                                     (invalid, shard.invalid), (errors, shard.errors)):
+                for key, value in list(counters.items()):
+                    totals[key] = totals.get(key, 0) + value
+            for function, histogram in list(shard.latency.items()):
+                latency.setdefault(function, _Histogram(LATENCY_BUCKETS)).merge(histogram)
+            batch_sizes.merge(shard.batch_sizes)
+
+        cache = conversion_cache_info()
+        return {
+            'calls': calls,
+            'grades': grades,
+            'invalid': invalid,
+            'errors': errors,
+            'latency': {function: _histogram_dict(histogram) for function, histogram in latency.items()},
+            'batch_sizes': _histogram_dict(batch_sizes),
+            'cache': {'hits': cache.hits, 'misses': cache.misses, 'size': cache.currsize},
+        }
+
+    def to_prometheus(self):
+        """
+        Export the counters in the Prometheus text exposition format (0.0.4).
+
+        Returns:
+            str: The metrics text
+        """
+        snapshot = self.snapshot()
+        prefix = METRIC_PREFIX
+        lines = []
+
+        def family(name, metric_type, help_text):
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} {metric_type}')
+
+        family('calls_total', 'counter', 'Grade function calls.')
+        for function, count in sorted(snapshot['calls'].items()):
+            lines.append(f'{prefix}_calls_total{{function="{function}"}} {count}')
+        family('processed_total', 'counter', 'Grades handled by the grade functions.')
+        for function, count in sorted(snapshot['grades'].items()):
+            lines.append(f'{prefix}_processed_total{{function="{function}"}} {count}')
+        family('invalid_total', 'counter', 'Invalid grades by error code.')
+        for code, count in sorted(snapshot['invalid'].items()):
+            lines.append(f'{prefix}_invalid_total{{code="{code}"}} {count}')
+        family('rejected_total', 'counter', 'Calls whose input was rejected, by error code.')
+        for (function, error_code), count in sorted(snapshot['errors'].items()):
+            lines.append(f'{prefix}_rejected_total{{function="{function}",error_code="{error_code}"}} {count}')
+
+        family('conversion_cache_hits_total', 'counter', 'Grade conversion cache hits.')
+        lines.append(f"{prefix}_conversion_cache_hits_total {snapshot['cache']['hits']}")
+        family('conversion_cache_misses_total', 'counter', 'Grade conversion cache misses.')
+        lines.append(f"{prefix}_conversion_cache_misses_total {snapshot['cache']['misses']}")
+        family('conversion_cache_entries', 'gauge', 'Grade conversion cache size.')
+        lines.append(f"{prefix}_conversion_cache_entries {snapshot['cache']['size']}")
+
+        family('call_duration_seconds', 'histogram', 'Grade function call latency.')
+        for function, histogram in sorted(snapshot['latency'].items()):
+            lines.extend(_histogram_lines(f'{prefix}_call_duration_seconds', histogram, LATENCY_BUCKETS,
+                                          f'function="{function}",'))
+        family('batch_classes', 'histogram', 'Classes per process_grades_batch call.')
+        lines.extend(_histogram_lines(f'{prefix}_batch_classes', snapshot['batch_sizes'], BATCH_SIZE_BUCKETS))
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """
+        Write the Prometheus text to path atomically (write a temporary file, then rename).
+
+        Args:
+            path (str): Output file, e.g. in the node_exporter textfile directory
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        handle, temporary = tempfile.mkstemp(dir=directory, prefix='.metrics-', suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w', encoding='utf-8') as metrics_file:
+                metrics_file.write(self.to_prometheus())
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+
+def _histogram_dict(histogram):
+    return {'counts': list(histogram.counts), 'sum': histogram.sum, 'count': histogram.count}
+
+
+def _histogram_lines(name, histogram, buckets, labels=''):
+    """Prometheus lines of one histogram (cumulative buckets, sum and count)."""
+    lines = []
+    cumulative = 0
+    for bound, count in zip(buckets + ('+Inf',), histogram['counts']):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels}le="{bound}"}} {cumulative}')
+    plain_labels = labels.rstrip(',')
+    suffix = f'{{{plain_labels}}}' if plain_labels else ''
+    lines.append(f"{name}_sum{suffix} {histogram['sum']}")
+    lines.append(f"{name}_count{suffix} {histogram['count']}")
+    return lines
+
+
+def start_metrics_file_writer(metrics, path, interval=15.0):
+    """
+    Rewrite a Prometheus text file every interval seconds on a daemon thread.
+
+    Args:
+        metrics (GradeMetrics): Metrics to export
+        path (str): Output file
+        interval (float): Seconds between writes
+
+    Returns:
+        threading.Event: Set it to stop the writer (after a final write)
+    """
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            metrics.write_prometheus(path)
+        metrics.write_prometheus(path)
+
+    threading.Thread(target=run, name='grade-metrics-writer', daemon=True).start()
+    return stop
@@ -0,0 +1,481 @@
+"""
+Local HTTP grading service (standard library only).
+
+Endpoints:
+
+- POST /grades   Grade one class. The body is JSON (a list of grades, or
+                 {"grades": [...], "max_students": ..., "min_students": ...})
+                 or CSV (Content-Type: text/csv, one grade per row; use
+                 ?column=<index or name>&header=1 for wider exports).
+                 Responds with the process_grades result.
+- POST /summary  Same input as /grades, responds with
+                 {"summary": get_grade_summary(result), "result": result}.
+- POST /batch    JSON list of classes. Results are streamed back as
+                 newline-delimited JSON (one line per class) with chunked
+                 transfer encoding, built lazily from process_grades_batch.
+- GET /health    Liveness check and micro-batcher counters.
+- GET /metrics   grade_metrics counters in the Prometheus text format (when
+                 the server was started with metrics).
+
+Connections are kept alive (HTTP/1.1), and concurrent /grades and /summary
+requests are micro-batched: while one vectorized process_grades_batch call
+runs, newly arrived classes queue up and are graded together in the next one.
+
+Usage:
+    python grade_server.py serve --port 8080
+    python grade_server.py serve --metrics --metrics-file /var/lib/node_exporter/grades.prom
+    python grade_server.py loadtest --requests 5000 --concurrency 16
+"""
+
+import argparse
+import http.client
+import io
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from chat_and_code_explain import get_grade_summary, process_grades, process_grades_batch
+from grade_datagen import generate_grades
+from grade_io import csv_grade_chunks
+from grade_metrics import enable_metrics, start_metrics_file_writer
+
+# Largest number of classes graded in one process_grades_batch call
+DEFAULT_MAX_BATCH = 256
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+
+class MicroBatcher:
+    """
+    Collects classes submitted from many threads and grades them in batches.
+
+    A single worker thread takes every class queued so far (up to max_batch),
+    optionally waiting max_delay seconds for more, and grades each group of
+    classes with the same limits in one process_grades_batch call. Under load
+    the classes that arrive while a batch runs form the next batch, so batching
+    adds no latency when max_delay is 0.
+    """
+
+    def __init__(self, max_batch=DEFAULT_MAX_BATCH, max_delay=0.0):
+        """
+        Args:
+            max_batch (int): Largest number of classes per batch
+            max_delay (float): Seconds to wait for more classes before grading a batch
+        """
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Counters for monitoring
+        self.batch_count = 0
+        self.class_count = 0
+        self.largest_batch = 0
+
+    def submit(self, grades, max_students=1000, min_students=1):
+        """
+        Grade one class, blocking until its batch has been processed.
+
+        Args:
+            grades (list): List of grades (numeric 0-100 or letters A-F with +/- modifiers)
+            max_students (int): Maximum number of students allowed (default: 1000)
+            min_students (int): Minimum number of students required (default: 1)
+
+        Returns:
+            dict: Same result (or error) dict as process_grades
+        """
+        if not isinstance(grades, list):
+            return process_grades(grades, max_students, min_students)
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='grade-batcher', daemon=True)
+                self._thread.start()
+
+        request = {'grades': grades, 'limits': (max_students, min_students),
+                   'done': threading.Event(), 'result': None, 'error': None}
+        self._queue.put(request)
+        request['done'].wait()
+        if request['error'] is not None:
+            raise request['error']
+        return request['result']
+
+    def stats(self):
+        """
+        Get the batching counters.
+
+        Returns:
+            dict: Number of batches, classes graded and the largest batch
+        """
+        return {'batches': self.batch_count, 'classes': self.class_count,
+                'largest_batch': self.largest_batch}
+
+    def _run(self):
+        """Worker thread: collect and grade batches forever."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    timeout = deadline - time.monotonic()
+                    batch.append(self._queue.get(timeout=timeout) if timeout > 0
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._grade(batch)
+
+    def _grade(self, batch):
+        """Grade one batch, one process_grades_batch call per distinct set of limits."""
+        try:
+            groups = {}
+            for request in batch:
+                groups.setdefault(request['limits'], []).append(request)
+
+            for (max_students, min_students), requests in groups.items():
+                try:
+                    results = process_grades_batch([request['grades'] for request in requests],
+                                                   max_students=max_students, min_students=min_students)
+                    for index, request in enumerate(requests):
+                        request['result'] = results[index]
+                except Exception as error:
+                    for request in requests:
+                        request['error'] = error
+                for request in requests:
+                    request['done'].set()
+        except Exception as error:
+            # Fail whatever is left of this batch; the worker thread must keep running
+            for request in batch:
+                if not request['done'].is_set():
+                    request['error'] = error
+                    request['done'].set()
+
+        self.batch_count += 1
+        self.class_count += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+
+def parse_limit(value, name, allow_none=False):
+    """
+    Coerce a class size limit from a JSON body to int.
+
+    Args:
+        value: The JSON value
+        name (str): Field name for the error message
+        allow_none (bool): Whether null (no limit) is accepted
+
+    Returns:
+        int: The limit (None when allowed and given)
+
+    Raises:
+        ValueError: If the value is not an integer (the client gets a 400)
+    """
+    if value is None and allow_none:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be an integer, got {json.dumps(value)}') from None
+
+
+class GradeRequestHandler(BaseHTTPRequestHandler):
+    """Handles the grading endpoints on keep-alive HTTP/1.1 connections."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'GradeServer/1.0'
+    # Headers and body are separate writes; Nagle would hold the body back ~40 ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/health':
+            self.send_json(200, {'status': 'ok', 'batcher': self.server.batcher.stats()})
+        elif path == '/metrics' and self.server.metrics is not None:
+            data = self.server.metrics.to_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self.send_json(404, {'error': f'Unknown endpoint {self.path}', 'error_code': 'NOT_FOUND'})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            body = self.read_body()
+            if url.path in ('/grades', '/summary'):
+                grades, max_students, min_students = self.parse_grades(body, query)
+                result = self.server.batcher.submit(grades, max_students, min_students)
+                if url.path == '/summary':
+                    result = {'summary': get_grade_summary(result), 'result': result}
+                    self.send_json(422 if 'error' in result['result'] else 200, result)
+                else:
+                    self.send_json(422 if 'error' in result else 200, result)
+            elif url.path == '/batch':
+                self.stream_batch(body, query)
+            else:
+                self.send_json(404, {'error': f'Unknown endpoint {url.path}', 'error_code': 'NOT_FOUND'})
+        except ValueError as error:
+            self.send_json(400, {'error': str(error), 'error_code': 'BAD_REQUEST'})
+
+    def read_body(self):
+        """Read the request body (Content-Length is required)."""
+        length = self.headers.get('Content-Length')
+        if length is None:
+            raise ValueError('Content-Length header is required')
+        length = int(length)
+        if length > MAX_BODY_SIZE:
+            raise ValueError(f'Request body too large (max {MAX_BODY_SIZE} bytes)')
+        return self.rfile.read(length)
+
+    def parse_grades(self, body, query):
+        """
+        Decode a JSON or CSV body into grades and class size limits.
+
+        Returns:
+            tuple: (grades, max_students, min_students)
+        """
+        max_students = int(query['max_students']) if 'max_students' in query else 1000
+        min_students = int(query.get('min_students', 1))
+
+        content_type = self.headers.get('Content-Type', 'application/json').split(';')[0].strip()
+        if content_type == 'text/csv':
+            column = query.get('column', '0')
+            column = int(column) if column.isdigit() else column
+            header = query.get('header', '0') in ('1', 'true', 'yes')
+            lines = io.StringIO(body.decode('utf-8'), newline='')
+            grades = [grade for chunk in csv_grade_chunks(lines, column, header) for grade in chunk]
+            return grades, max_students, min_students
+
+        try:
+            payload = json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError) as error:
+            raise ValueError(f'Invalid JSON body: {error}') from None
+        if isinstance(payload, dict):
+            if 'max_students' in payload:
+                max_students = parse_limit(payload['max_students'], 'max_students', allow_none=True)
+            if 'min_students' in payload:
+                min_students = parse_limit(payload['min_students'], 'min_students')
+            payload = payload.get('grades')
+        return payload, max_students, min_students
+
+    def stream_batch(self, body, query):
+        """Grade a JSON list of classes and stream one NDJSON line per class."""
+        try:
+            classes = json.loads(body)
+        except (UnicodeDecodeError, json.JSONDecodeError) as error:
+            raise ValueError(f'Invalid JSON body: {error}') from None
+        if not isinstance(classes, list):
+            raise ValueError('Batch body must be a JSON list of classes')
+        max_students = int(query['max_students']) if 'max_students' in query else 1000
+        min_students = int(query.get('min_students', 1))
+        results = process_grades_batch(classes, max_students=max_students, min_students=min_students)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        # Each class's dict is only built when its line is written
+        lines = []
+        for index in range(len(classes)):
+            lines.append(json.dumps(results[index]))
+            if len(lines) == 64 or index == len(classes) - 1:
+                self.write_chunk(('\n'.join(lines) + '\n').encode('utf-8'))
+                lines = []
+        self.write_chunk(b'')
+
+    def write_chunk(self, data):
+        """Write one chunk of a chunked response (empty data ends the response)."""
+        self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+
+    def send_json(self, status, payload):
+        """Send a complete JSON response."""
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class GradeServer(ThreadingHTTPServer):
+    """Threaded HTTP server sharing one MicroBatcher between its connections."""
+
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 8080), max_batch=DEFAULT_MAX_BATCH, max_delay=0.0,
+                 verbose=False, metrics=None):
+        """
+        Args:
+            address (tuple): (host, port) to listen on; port 0 picks a free port
+            max_batch (int): Largest number of classes per process_grades_batch call
+            max_delay (float): Seconds the batcher waits for more classes
+            verbose (bool): Log every request to stderr
+            metrics (grade_metrics.GradeMetrics): Counters served at GET /metrics
+                (install them with grade_metrics.set_metrics_sink to fill them)
+        """
+        super().__init__(address, GradeRequestHandler)
+        self.batcher = MicroBatcher(max_batch, max_delay)
+        self.verbose = verbose
+        self.metrics = metrics
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+def start_grade_server(host='127.0.0.1', port=0, **options):
+    """
+    Start a GradeServer on a background thread.
+
+    Args:
+        host (str): Interface to listen on
+        port (int): Port to listen on (default: any free port)
+        **options: Passed on to GradeServer
+
+    Returns:
+        GradeServer: The running server; call shutdown() and server_close() to stop it
+    """
+    server = GradeServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name='grade-server', daemon=True).start()
+    return server
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * fraction // 1))
+    return sorted_values[int(rank) - 1]
+
+
+def run_load_test(url, payloads, requests=2000, concurrency=16, path='/grades'):
+    """
+    Send JSON requests from several keep-alive connections and measure latency.
+
+    Args:
+        url (str): Base URL of the server, e.g. 'http://127.0.0.1:8080'
+        payloads (list): JSON-serializable request bodies, used round robin
+        requests (int): Total number of requests to send
+        concurrency (int): Number of client threads, one connection each
+        path (str): Endpoint to call
+
+    Returns:
+        dict: requests, errors, seconds, requests_per_sec, p50_ms and p99_ms
+    """
+    address = urlsplit(url)
+    bodies = [json.dumps(payload).encode('utf-8') for payload in payloads]
+    headers = {'Content-Type': 'application/json'}
+    counter = iter(range(requests))
+    counter_lock = threading.Lock()
+    latencies = []
+    errors = []
+
+    def client():
+        connection = http.client.HTTPConnection(address.hostname, address.port, timeout=60)
+        local_latencies = []
+        try:
+            while True:
+                with counter_lock:
+                    index = next(counter, None)
+                if index is None:
+                    break
+                start_time = time.perf_counter()
+                connection.request('POST', path, bodies[index % len(bodies)], headers)
+                response = connection.getresponse()
+                response.read()
+                local_latencies.append(time.perf_counter() - start_time)
+                if response.status >= 500:
+                    errors.append(response.status)
+        finally:
+            connection.close()
+            latencies.extend(local_latencies)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start_time
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'seconds': seconds,
+        'requests_per_sec': len(latencies) / seconds if seconds > 0 else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local HTTP grading service')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help='Run the grading server')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8080)
+    serve.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH)
+    serve.add_argument('--max-delay', type=float, default=0.0, help='seconds to wait for more classes')
+    serve.add_argument('--verbose', action='store_true')
+    serve.add_argument('--metrics', action='store_true', help='collect metrics and serve them at /metrics')
+    serve.add_argument('--metrics-file', help='also write the metrics to this file (implies --metrics)')
+    serve.add_argument('--metrics-interval', type=float, default=15.0, help='seconds between file writes')
+
+    loadtest = commands.add_parser('loadtest', help='Measure latency and throughput')
+    loadtest.add_argument('--url', help='server to test (default: start one locally)')
+    loadtest.add_argument('--requests', type=int, default=5000)
+    loadtest.add_argument('--concurrency', type=int, default=16)
+    loadtest.add_argument('--class-size', type=int, default=30)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        metrics = enable_metrics() if args.metrics or args.metrics_file else None
+        stop_writer = None
+        if args.metrics_file:
+            stop_writer = start_metrics_file_writer(metrics, args.metrics_file, args.metrics_interval)
+        server = GradeServer((args.host, args.port), args.max_batch, args.max_delay, args.verbose, metrics)
+        print(f'Serving grades on {server.url}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if stop_writer is not None:
+                stop_writer.set()
+        return
+
+    server = None if args.url else start_grade_server()
+    url = args.url or server.url
+    payloads = [generate_grades(args.class_size, seed=seed) for seed in range(50)]
+    try:
+        report = run_load_test(url, payloads, args.requests, args.concurrency)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+    print(f"{report['requests']} requests ({report['errors']} errors) in {report['seconds']:.2f}s: "
+          f"{report['requests_per_sec']:.0f} req/s, p50 {report['p50_ms']:.2f} ms, "
+          f"p99 {report['p99_ms']:.2f} ms")
+    if server is not None:
+        print(f'Micro-batching: {server.batcher.stats()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""
+asyncio front end for grade processing.
+
+process_grades is synchronous and CPU-bound, so calling it from a coroutine
+blocks the event loop for as long as the grading takes. GradeService keeps
+the loop responsive:
+
+- Small inputs are processed inline, where the call is cheaper than a
+  round trip to another process
+- Larger inputs are sent to a bounded process pool
+- At most max_pending large requests are handed to the pool at a time;
+  further callers wait their turn (backpressure) instead of queueing
+  unbounded work and pickled inputs inside the executor
+
+Example:
+    async with GradeService(workers=4) as service:
+        result = await service.process_grades(grades)
+
+    # Or with the shared default service, shut down when done
+    result = await process_grades_async(grades)
+    await close_default_service()
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from chat_and_code_explain import check_grade_count, process_grades
+
+# Inputs up to this many grades are processed on the event loop. It has to
+# stay below process_grades' default max_students (1000): larger inputs are
+# rejected inline by the size check, so they never reach the pool.
+INLINE_THRESHOLD = 500
+
+
+class GradeService:
+    """Runs process_grades for coroutines without blocking the event loop."""
+
+    def __init__(self, workers=None, inline_threshold=INLINE_THRESHOLD, max_pending=None,
+                 executor=None):
+        """
+        Args:
+            workers (int): Worker processes in the pool (default: CPU count)
+            inline_threshold (int): Largest input processed on the event loop
+            max_pending (int): Large requests handed to the pool at once
+                (default: twice the number of workers)
+            executor (concurrent.futures.Executor): Existing pool to use; it is
+                not shut down by close()
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.inline_threshold = inline_threshold
+        self.max_pending = max_pending or 2 * self.workers
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._slots = None
+        self._slots_loop = None
+
+        # Counters for monitoring
+        self.inline_count = 0
+        self.offloaded_count = 0
+        self.cancelled_count = 0
+        self.in_flight = 0
+        self.waiting = 0
+
+    def _get_executor(self):
+        """Create the process pool on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _get_slots(self):
+        """Semaphore limiting the pending requests, one per event loop."""
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._slots_loop = loop
+        return self._slots
+
+    async def process_grades(self, grades, max_students=1000, min_students=1, compact=False):
+        """
+        Process grades without blocking the event loop.
+
+        Cancelling the awaiting task while it waits for a slot or while its
+        request is still queued in the pool drops the request. A request a
+        worker has already started runs to completion and its result is
+        discarded.
+
+        Args:
+            grades (list): List of grades (numeric 0-100 or letters A-F with +/- modifiers)
+            max_students (int): Maximum number of students allowed (default: 1000)
+            min_students (int): Minimum number of students required (default: 1)
+            compact (bool): Return a slotted GradeResult instead of nested dicts
+
+        Returns:
+            dict: Same result (or error) dict as process_grades
+        """
+        # Size errors are cheap to produce, only real work goes to the pool
+        if (not isinstance(grades, list) or len(grades) <= self.inline_threshold
+                or check_grade_count(len(grades), max_students, min_students)):
+            self.inline_count += 1
+            return process_grades(grades, max_students, min_students, compact)
+
+        slots = self._get_slots()
+        self.waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self._get_executor(), process_grades, grades, max_students, min_students, compact
+            )
+        except asyncio.CancelledError:
+            self.cancelled_count += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            slots.release()
+
+        self.offloaded_count += 1
+        return result
+
+    def stats(self):
+        """
+        Get the service counters.
+
+        Returns:
+            dict: inline, offloaded and cancelled request counts, plus the
+            requests currently in the pool and waiting for a slot
+        """
+        return {
+            'inline': self.inline_count,
+            'offloaded': self.offloaded_count,
+            'cancelled': self.cancelled_count,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+        }
+
+    async def close(self):
+        """Shut down the process pool if the service created it."""
+        if self._executor is not None and self._owns_executor:
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+_default_service = None
+
+
+def get_default_service():
+    """
+    Get the shared service used by process_grades_async.
+
+    Returns:
+        GradeService: Service with the default settings, created on first use
+    """
+    global _default_service
+    if _default_service is None:
+        _default_service = GradeService()
+    return _default_service
+
+
+async def close_default_service():
+    """
+    Shut down the shared service's process pool.
+
+    Its workers otherwise stay alive until the interpreter exits. A later
+    process_grades_async call starts a new shared service.
+    """
+    global _default_service
+    service, _default_service = _default_service, None
+    if service is not None:
+        await service.close()
+
+
+async def process_grades_async(grades, max_students=1000, min_students=1, compact=False, service=None):
+    """
+    Process grades without blocking the event loop.
+
+    Without a service the shared one from get_default_service() is used; its
+    process pool starts with the first large input and keeps running until
+    close_default_service() is awaited.
+
+    Args:
+        grades (list): List of grades (numeric 0-100 or letters A-F with +/- modifiers)
+        max_students (int): Maximum number of students allowed (default: 1000)
+        min_students (int): Minimum number of students required (default: 1)
+        compact (bool): Return a slotted GradeResult instead of nested dicts
+        service (GradeService): Service to run on (default: the shared service)
+
+    Returns:
+        dict: Same result (or error) dict as process_grades
+    """
+    service = service or get_default_service()
+    return await service.process_grades(grades, max_students, min_students, compact)
@@ -0,0 +1,205 @@
+"""
+Tests for the todo list manager (bar.py).
+"""
+
+import contextlib
+import io
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import bar
+from bar import IdAllocator, TodoStore
+
+
+class TestTodoStore(unittest.TestCase):
+    """Test the store and its priority and completion indexes."""
+
+    def setUp(self):
+        self.store = TodoStore()
+        for task, priority in (("Buy groceries", "high"), ("Write report", "medium"),
+                               ("Call dentist", "low"), ("Exercise", "medium")):
+            self.store.add(task, priority)
+
+    def test_add_and_get(self):
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(self.store.get(2), {"id": 2, "task": "Write report", "priority": "medium",
+                                             "completed": False})
+        self.assertIsNone(self.store.get(99))
+        self.assertEqual([todo["id"] for todo in self.store], [1, 2, 3, 4])
+
+    def test_filters_keep_insertion_order(self):
+        self.store.mark_completed(4)
+        self.store.mark_completed(2)
+        self.store.mark_completed(2)
+        self.assertEqual([todo["id"] for todo in self.store.list("completed")], [2, 4])
+        self.assertEqual([todo["id"] for todo in self.store.list("pending")], [1, 3])
+        self.assertEqual([todo["id"] for todo in self.store.list()], [1, 2, 3, 4])
+        self.assertTrue(self.store.get(4)["completed"])
+        self.assertIsNone(self.store.mark_completed(99))
+
+    def test_completed_index_is_sorted_once(self):
+        self.store.mark_completed(3)
+        self.store.mark_completed(1)
+        self.assertFalse(self.store._completed_sorted)
+        self.assertEqual([todo["id"] for todo in self.store.list("completed")], [1, 3])
+        self.assertTrue(self.store._completed_sorted)
+
+        # Completions in ID order keep the index sorted, so listing does not sort again
+        self.store.mark_completed(4)
+        self.assertTrue(self.store._completed_sorted)
+        with mock.patch("builtins.sorted", side_effect=AssertionError):
+            self.assertEqual([todo["id"] for todo in self.store.list("completed")], [1, 3, 4])
+        self.store.mark_completed(2)
+        self.assertEqual([todo["id"] for todo in self.store.list("completed")], [1, 2, 3, 4])
+
+    def test_by_priority(self):
+        self.assertEqual([todo["task"] for todo in self.store.by_priority("medium")],
+                         ["Write report", "Exercise"])
+        self.assertEqual(self.store.by_priority("urgent"), [])
+
+    def test_remove_updates_indexes(self):
+        self.store.mark_completed(2)
+        self.assertEqual(self.store.remove(2)["task"], "Write report")
+        self.assertIsNone(self.store.remove(2))
+        self.assertNotIn(2, self.store)
+        self.assertEqual(self.store.list("completed"), [])
+        self.assertEqual([todo["id"] for todo in self.store.by_priority("medium")], [4])
+
+        # IDs of removed todos are not given out again
+        self.assertEqual(self.store.add("Read")["id"], 5)
+
+    def test_without_backend(self):
+        self.store.compact()
+        self.store.close()
+        self.store.clear()
+        self.assertEqual(len(self.store), 0)
+
+    def test_many_todos(self):
+        store = TodoStore()
+        for number in range(100_000):
+            store.add(f"Task {number}", ("low", "medium", "high")[number % 3])
+        for todo_id in range(1, 100_001, 2):
+            store.remove(todo_id)
+        for todo_id in range(2, 100_001, 4):
+            store.mark_completed(todo_id)
+        self.assertEqual(len(store), 50_000)
+        self.assertEqual(len(store.list("completed")), 25_000)
+        self.assertEqual(len(store.by_priority("high")) + len(store.by_priority("low"))
+                         + len(store.by_priority("medium")), 50_000)
+
+
+class TestIdAllocator(unittest.TestCase):
+    """Test ID allocation and its persistence."""
+
+    def test_ids_survive_removals(self):
+        store = TodoStore()
+        for task in ("a", "b", "c"):
+            store.add(task)
+        store.remove(3)
+        store.remove(2)
+        self.assertEqual(store.add("d")["id"], 4)
+        store.clear()
+        self.assertEqual(store.add("e")["id"], 5)
+
+    def test_persisted_counter(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "todo_ids")
+            ids = IdAllocator(path, block_size=10)
+            self.assertEqual([ids.allocate() for _ in range(12)], list(range(1, 13)))
+            with open(path, encoding="utf-8") as counter_file:
+                self.assertEqual(counter_file.read(), "20\n")
+
+            # A restart (or crash) continues after the reserved block
+            reopened = IdAllocator(path, block_size=10)
+            self.assertEqual(reopened.allocate(), 21)
+            reopened.advance(57)
+            self.assertEqual(reopened.allocate(), 58)
+            self.assertEqual(IdAllocator(path).allocate(), 67)
+            self.assertEqual(os.listdir(directory), ["todo_ids"])
+
+        with self.assertRaises(ValueError):
+            IdAllocator(block_size=0)
+
+    def test_bulk_interleaved_add_and_remove(self):
+        """Two million interleaved operations never reuse an ID or touch the wrong todo."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "todo_ids")
+            store = TodoStore(IdAllocator(path, block_size=10_000))
+            live = []
+            rng = random.Random(22)
+            last_id = 0
+            for step in range(2_000_000):
+                if live and rng.random() < 0.45:
+                    # Remove a random live todo (swap with the last for O(1))
+                    position = rng.randrange(len(live))
+                    live[position], live[-1] = live[-1], live[position]
+                    todo_id = live.pop()
+                    self.assertEqual(store.remove(todo_id)["task"], f"Task {todo_id}")
+                else:
+                    todo = store.add(f"Task {last_id + 1}")
+                    self.assertEqual(todo["id"], last_id + 1)
+                    last_id = todo["id"]
+                    live.append(last_id)
+                    if step % 7 == 0:
+                        store.mark_completed(live[rng.randrange(len(live))])
+
+            self.assertEqual(len(store), len(live))
+            self.assertEqual(sorted(todo["id"] for todo in store), sorted(live))
+            self.assertTrue(all(store.get(todo_id)["task"] == f"Task {todo_id}" for todo_id in live))
+            self.assertGreater(IdAllocator(path).allocate(), last_id)
+
+
+class TestModuleFunctions(unittest.TestCase):
+    """Test the module-level functions on the shared store."""
+
+    def setUp(self):
+        patcher = mock.patch.object(bar, "todos", TodoStore())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_demo_flow(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            bar.add_todo("Buy groceries", "high")
+            bar.add_todo("Write report")
+            bar.mark_completed(2)
+            bar.mark_completed(7)
+            bar.remove_todo(1)
+            bar.list_todos()
+        self.assertEqual(output.getvalue().splitlines(), [
+            "Added todo: Buy groceries",
+            "Added todo: Write report",
+            "Marked todo as completed: Write report",
+            "Todo with ID 7 not found.",
+            "Removed todo with ID: 1",
+            "[✓] Write report (ID: 2, Priority: medium)",
+        ])
+        self.assertEqual(bar.get_todos_by_priority("medium"), [bar.todos.get(2)])
+
+    def test_bulk_operations(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(bar.add_todos(["a", ("b", "high"), "c"], priority="low"), {"added": 3})
+            self.assertEqual(bar.mark_completed_many([1, 3, 9]), {"completed": 2, "not_found": [9]})
+            self.assertEqual(bar.remove_todos([2, 2, 7]), {"removed": 1, "not_found": [2, 7]})
+        self.assertEqual(output.getvalue(), "")
+        self.assertEqual([(todo["task"], todo["priority"], todo["completed"]) for todo in bar.todos],
+                         [("a", "low", True), ("c", "low", True)])
+        self.assertEqual(bar.todos.by_priority("high"), [])
+
+        with contextlib.redirect_stdout(output):
+            bar.add_todos(f"Task {number}" for number in range(5))
+            bar.remove_todos(range(7, 10), verbose=True)
+            bar.mark_completed_many([4], verbose=True)
+        self.assertEqual(output.getvalue().splitlines(), [
+            "Removed 2 todos (1 IDs not found)",
+            "Marked 1 todos as completed (0 IDs not found)",
+        ])
+        self.assertEqual(len(bar.todos), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Tests for the benchmark suite (benchmarks.py).
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmarks import (
+    BENCHMARKS, DATASET_MIXES, compare_to_baseline, load_results, main, make_dataset,
+    run_benchmarks, save_results, speedups, time_call
+)
+from chat_and_code_explain import convert_to_numeric_grade
+
+
+class TestDatasets(unittest.TestCase):
+    """Test the benchmark datasets."""
+
+    def test_mixes(self):
+        for mix in DATASET_MIXES:
+            with self.subTest(mix=mix):
+                grades = make_dataset(mix, 500)
+                self.assertEqual(len(grades), 500)
+                self.assertEqual(grades, make_dataset(mix, 500))
+
+        self.assertTrue(all(isinstance(grade, float) for grade in make_dataset('numeric', 100)))
+        self.assertTrue(all(isinstance(grade, str) for grade in make_dataset('letter', 100)))
+        self.assertEqual(set(map(str, make_dataset('identical', 100))), {'85'})
+        dirty = make_dataset('dirty', 1000)
+        invalid = sum(convert_to_numeric_grade(grade) is None for grade in dirty)
+        self.assertTrue(50 < invalid < 300)
+
+        with self.assertRaises(ValueError):
+            make_dataset('clean', 10)
+
+
+class TestTiming(unittest.TestCase):
+    """Test measurement, result files and baseline comparison."""
+
+    def test_time_call(self):
+        calls = []
+        timing = time_call(calls.append, (1,), warmup=2, repeat=4, min_time=0.001)
+        self.assertEqual(set(timing), {'loops', 'repeat', 'best', 'median', 'mean', 'stdev'})
+        self.assertEqual(timing['repeat'], 4)
+        self.assertLessEqual(timing['best'], timing['median'])
+        # Warmup, calibration and the remaining samples all called the function
+        self.assertGreaterEqual(len(calls), 2 + 4 * timing['loops'])
+
+    def test_run_benchmarks(self):
+        seen = []
+        results = run_benchmarks(sizes=[20], mixes=['dirty', 'letter'], repeat=2, min_time=0.001,
+                                 progress=seen.append)
+        self.assertEqual(len(results), 2 * len(BENCHMARKS))
+        self.assertEqual(seen, results)
+        self.assertTrue(all(result['items_per_sec'] > 0 for result in results))
+        json.dumps(results)
+
+        ratios = speedups(results, 'process_grades_optimized', 'process_grades')
+        self.assertEqual(set(ratios), {(20, 'dirty'), (20, 'letter')})
+
+    def test_save_and_compare(self):
+        baseline = [{'benchmark': 'process_grades', 'size': 10, 'mix': 'numeric', 'median': 1.0},
+                    {'benchmark': 'process_grades', 'size': 10, 'mix': 'letter', 'median': 1.0},
+                    {'benchmark': 'process_grades', 'size': 10, 'mix': 'dirty', 'median': 1.0}]
+        current = [{'benchmark': 'process_grades', 'size': 10, 'mix': 'numeric', 'median': 1.25},
+                   {'benchmark': 'process_grades', 'size': 10, 'mix': 'letter', 'median': 0.5},
+                   {'benchmark': 'process_grades', 'size': 10, 'mix': 'dirty', 'median': 1.05},
+                   {'benchmark': 'process_grades', 'size': 99, 'mix': 'dirty', 'median': 1.0}]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            save_results(path, baseline)
+            with open(path, encoding='utf-8') as results_file:
+                self.assertIn('environment', json.load(results_file))
+            comparison = compare_to_baseline(current, load_results(path), threshold=0.10)
+
+        self.assertEqual([entry['status'] for entry in comparison], ['regression', 'improvement', 'ok'])
+        self.assertAlmostEqual(comparison[0]['ratio'], 1.25)
+
+    def test_command_line_exit_status(self):
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = os.path.join(directory, 'baseline.json')
+            arguments = ['--sizes', '10', '--mixes', 'numeric', '--benchmarks', 'process_grades',
+                         '--repeat', '2', '--min-time', '0.001']
+            with open(os.devnull, 'w') as devnull, mock.patch('sys.stdout', devnull):
+                self.assertEqual(main(arguments + ['--save-baseline', baseline]), 0)
+                results = load_results(baseline)
+                # A baseline 1000x faster than anything possible must be reported
+                for result in results:
+                    result['median'] /= 1000
+                save_results(baseline, results)
+                self.assertEqual(main(arguments + ['--baseline', baseline]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+"""
+Tests for the synthetic grade data generator (grade_datagen.py).
+"""
+
+import math
+import os
+import statistics
+import tempfile
+import unittest
+from unittest import mock
+
+from chat_and_code_explain import convert_to_numeric_grade, np, process_grades
+from grade_datagen import (
+    BLOCK_SIZE, DISTRIBUTIONS, INVALID_TOKENS, GradeGenerator, generate_grade_array,
+    generate_grades, write_grade_dataset
+)
+from grade_io import process_grade_file
+
+
+def kind_of(grade):
+    """Entry kind of a generated grade."""
+    if grade is None:
+        return 'none'
+    if grade == '':
+        return 'empty'
+    if grade in INVALID_TOKENS:
+        return 'invalid'
+    if isinstance(grade, str) and not grade[0].isdigit():
+        return 'letter'
+    return 'numeric'
+
+
+class GeneratorChecks:
+    """Checks run with and without NumPy."""
+
+    def test_reproducible(self):
+        self.assertEqual(generate_grades(1000, seed=5), generate_grades(1000, seed=5))
+        self.assertNotEqual(generate_grades(1000, seed=5), generate_grades(1000, seed=6))
+
+    def test_chunks_match_whole_list(self):
+        rows = BLOCK_SIZE + 1234
+        generator = GradeGenerator(seed=2, distribution='bimodal')
+        chunks = list(generator.iter_chunks(rows, chunk_size=10_000))
+        self.assertEqual([len(chunk) for chunk in chunks[:-1]], [10_000] * (len(chunks) - 1))
+        self.assertEqual([grade for chunk in chunks for grade in chunk], generator.grades(rows))
+
+    def test_mix_ratios(self):
+        mix = {'numeric': 0.5, 'letter': 0.2, 'invalid': 0.1, 'none': 0.1, 'empty': 0.1}
+        grades = generate_grades(20_000, seed=1, mix=mix)
+        for kind, share in mix.items():
+            with self.subTest(kind=kind):
+                count = sum(kind_of(grade) == kind for grade in grades)
+                self.assertAlmostEqual(count / len(grades), share, delta=0.02)
+
+        only_letters = generate_grades(500, mix={'letter': 1}, letter_variants=0)
+        self.assertTrue(all(kind_of(grade) == 'letter' and grade.strip() == grade for grade in only_letters))
+
+    def test_values_match_conversion(self):
+        generator = GradeGenerator(seed=4, numeric_strings=0.3)
+        grades = generator.grades(5000)
+        values = generator.values(5000)
+        self.assertEqual(len(values), 5000)
+        for grade, value in zip(grades, values):
+            converted = convert_to_numeric_grade(grade)
+            if converted is None:
+                self.assertTrue(math.isnan(value) or not 0 <= value <= 100, grade)
+            else:
+                self.assertEqual(value, converted)
+
+    def test_numeric_styles(self):
+        grades = generate_grades(2000, mix={'numeric': 1}, decimals=0, numeric_strings=0.5)
+        self.assertEqual({type(grade) for grade in grades}, {int, str})
+        self.assertTrue(all(0 <= convert_to_numeric_grade(grade) <= 100 for grade in grades))
+
+
+class TestGradeGenerator(GeneratorChecks, unittest.TestCase):
+    """Generator checks using NumPy when it is installed."""
+
+    def test_distributions(self):
+        averages = {}
+        for distribution in DISTRIBUTIONS:
+            grades = generate_grades(20_000, seed=3, distribution=distribution, mix={'numeric': 1})
+            self.assertTrue(all(0 <= grade <= 100 for grade in grades))
+            averages[distribution] = statistics.fmean(grades)
+            if distribution == 'skewed':
+                # The long tail of low scores pulls the mean below the median
+                self.assertGreater(statistics.median(grades), averages[distribution])
+        self.assertAlmostEqual(averages['normal'], 76, delta=1)
+        self.assertAlmostEqual(averages['uniform'], 50, delta=1)
+        self.assertAlmostEqual(averages['bimodal'], 0.7 * 76 + 0.3 * 45, delta=1.5)
+
+    def test_invalid_tokens_are_rejected(self):
+        for token in INVALID_TOKENS:
+            with self.subTest(token=token):
+                self.assertIsNone(convert_to_numeric_grade(token))
+
+    def test_bad_settings(self):
+        with self.assertRaises(ValueError):
+            GradeGenerator(distribution='poisson')
+        with self.assertRaises(ValueError):
+            GradeGenerator(mix={'numbers': 1})
+        with self.assertRaises(ValueError):
+            GradeGenerator(mix={'numeric': 0})
+
+    def test_realistic_results(self):
+        result = process_grades(generate_grades(5000, seed=9), max_students=None)
+        self.assertNotIn('warning', result)
+        self.assertTrue(90 < result['validation_stats']['success_rate'] < 99)
+        counts = [data['count'] for data in result['grade_distribution'].values()]
+        self.assertTrue(all(count > 0 for count in counts))
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_array_output(self):
+        values = generate_grade_array(1000, seed=8)
+        grades = generate_grades(1000, seed=8)
+        self.assertEqual(values.dtype, np.float64)
+        missing = sum(kind_of(grade) in ('none', 'empty') for grade in grades)
+        self.assertGreaterEqual(int(np.isnan(values).sum()), missing)
+
+    def test_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            expected = process_grades(generate_grades(3000, seed=12), max_students=None)
+            for file_format in ('csv', 'columns'):
+                with self.subTest(file_format=file_format):
+                    path = os.path.join(directory, f'grades.{file_format}')
+                    self.assertEqual(write_grade_dataset(path, 3000, file_format, seed=12, chunk_size=700), 3000)
+                    result, report = process_grade_file(path)
+                    self.assertEqual(report['rows'], 3000)
+                    for key in ('validation_stats', 'grade_distribution', 'highest', 'lowest'):
+                        self.assertEqual(result[key], expected[key], key)
+                    self.assertAlmostEqual(result['average'], expected['average'], places=6)
+
+            with self.assertRaises(ValueError):
+                write_grade_dataset(os.path.join(directory, 'grades.xlsx'), 10, 'xlsx')
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestGradeGeneratorWithoutNumpy(GeneratorChecks, unittest.TestCase):
+    """Generator checks using the random module backend."""
+
+    def setUp(self):
+        patcher = mock.patch('grade_datagen.np', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+if __name__ == '__main__':
+    unittest.main()
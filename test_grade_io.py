@@ -0,0 +1,298 @@
+"""
+Tests for chunked grade file ingestion (grade_io.py).
+"""
+
+import csv
+import math
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from fractions import Fraction
+from unittest import mock
+
+from chat_and_code_explain import GradeAccumulator, np, process_grades
+from grade_io import (
+    GRADE_COLUMNS_MAGIC, NO_TOKEN, detect_grade_file_format, iter_csv_grade_chunks,
+    open_grade_columns, process_grade_file, write_grade_columns
+)
+
+
+MIXED_TOKENS = ['85', 'A-', '', 'invalid', '150', ' 92 ', 'b+', '-5', '73.5', 'F'] * 30
+
+
+def assert_results_match(test, actual, expected):
+    """Compare two process_grades results, allowing last-bit float sum differences."""
+    test.assertEqual(set(actual), set(expected))
+    for key, value in expected.items():
+        if key == 'average':
+            test.assertAlmostEqual(actual[key], value, places=9)
+        else:
+            test.assertEqual(actual[key], value, key)
+
+
+class GradeFileTestCase(unittest.TestCase):
+    """Creates a temporary directory for grade files."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def write_csv(self, name, rows):
+        path = self.path(name)
+        with open(path, 'w', newline='', encoding='utf-8') as grade_file:
+            csv.writer(grade_file).writerows(rows)
+        return path
+
+
+class TestCsvIngestion(GradeFileTestCase):
+    """Test chunked CSV reading."""
+
+    def test_chunks_cover_every_row(self):
+        path = self.write_csv('grades.csv', [[token] for token in MIXED_TOKENS])
+        chunks = list(iter_csv_grade_chunks(path, chunk_size=64))
+        self.assertEqual([len(chunk) for chunk in chunks], [64, 64, 64, 64, 44])
+        self.assertEqual(sum(chunks, []), MIXED_TOKENS)
+
+    def test_named_column_and_missing_cells(self):
+        path = self.write_csv('grades.csv', [['student', 'grade'], ['ann', '85'], ['bob'], ['cy', 'A']])
+        chunks = list(iter_csv_grade_chunks(path, column='grade', header=True))
+        self.assertEqual(chunks, [['85', None, 'A']])
+
+        with self.assertRaises(ValueError):
+            list(iter_csv_grade_chunks(path, column='score', header=True))
+        with self.assertRaises(ValueError):
+            list(iter_csv_grade_chunks(path, column='grade'))
+
+    def test_csv_matches_process_grades(self):
+        path = self.write_csv('grades.csv', [[token] for token in MIXED_TOKENS])
+        for chunk_size in (1, 7, 64, 100000):
+            with self.subTest(chunk_size=chunk_size):
+                result, report = process_grade_file(path, chunk_size=chunk_size)
+                assert_results_match(self, result, process_grades(MIXED_TOKENS))
+                self.assertEqual(report['format'], 'csv')
+                self.assertEqual(report['rows'], len(MIXED_TOKENS))
+                self.assertEqual(report['chunks'], -(-len(MIXED_TOKENS) // chunk_size))
+                self.assertGreater(report['rows_per_sec'], 0)
+
+    def test_limits_apply_to_whole_file(self):
+        path = self.write_csv('grades.csv', [['85']] * 50)
+        result, _ = process_grade_file(path, chunk_size=10, max_students=20)
+        self.assertEqual(result['error_code'], 'TOO_MANY_STUDENTS')
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestGradeColumns(GradeFileTestCase):
+    """Test the binary grade column format."""
+
+    def test_round_trip(self):
+        path = self.path('grades.gradecols')
+        rows = write_grade_columns(path, MIXED_TOKENS, chunk_size=64)
+        self.assertEqual(rows, len(MIXED_TOKENS))
+        self.assertEqual(detect_grade_file_format(path), 'columns')
+
+        columns = open_grade_columns(path)
+        self.assertEqual(len(columns), len(MIXED_TOKENS))
+        self.assertEqual(columns.values[:2].tolist(), [85.0, 92.0])
+        self.assertTrue(np.isnan(columns.values[2]))
+        self.assertEqual(columns.values[4], 150.0)  # out of range but numeric
+        self.assertEqual(columns.codes[:5].tolist(), [0, 0, 2, 3, 3])
+        self.assertEqual(len(columns.tokens), 10)
+        self.assertEqual(list(columns.iter_grades(chunk_size=7)), MIXED_TOKENS)
+        for name, spec in columns.header['columns'].items():
+            self.assertEqual(spec['offset'] % 64, 0, name)
+
+    def test_tokens_keep_their_types(self):
+        grades = [85, 85.0, '85', True, None, [85], float('nan'), 'B+']
+        path = self.path('grades.gradecols')
+        write_grade_columns(path, grades)
+        columns = open_grade_columns(path)
+        self.assertEqual(columns.token_ids.tolist(), list(range(8)))
+        decoded = list(columns.iter_grades())
+        self.assertEqual([type(grade) for grade in decoded[:6]], [int, float, str, bool, type(None), list])
+        self.assertTrue(math.isnan(decoded[6]))
+
+    def test_token_dictionary_limit(self):
+        grades = [85, 'A', 'oops', 86.5, 'oops', 'B']
+        path = self.path('grades.gradecols')
+        write_grade_columns(path, grades, max_tokens=3)
+        columns = open_grade_columns(path)
+        self.assertEqual(columns.tokens, [85, 'A', 'oops'])
+        self.assertEqual(columns.token_ids.tolist(), [0, 1, 2, NO_TOKEN, 2, NO_TOKEN])
+        self.assertEqual(list(columns.iter_grades()), [85, 'A', 'oops', 86.5, 'oops', 85.0])
+
+        result, _ = process_grade_file(path)
+        self.assertEqual(result['total_students'], 4)
+        self.assertEqual([entry['value'] for entry in result['warnings']['invalid_entries']], ['oops', 'oops'])
+
+    def test_missing_and_empty_grades_beyond_the_token_limit(self):
+        grades = [85, 'A', 'B', 90, None, '', 77, None, '', 'C-'] * 3
+        path = self.path('grades.gradecols')
+        write_grade_columns(path, grades, max_tokens=4)
+        columns = open_grade_columns(path)
+        self.assertEqual(columns.tokens, [85, 'A', 'B', 90])
+        self.assertEqual(list(columns.iter_grades())[4:6], [None, ''])
+
+        expected = process_grades(grades)
+        result, _ = process_grade_file(path, chunk_size=7)
+        assert_results_match(self, result, expected)
+        with mock.patch('grade_io.np', None):
+            result, _ = process_grade_file(path, chunk_size=7)
+        assert_results_match(self, result, expected)
+
+    def test_tagged_tokens_round_trip(self):
+        grades = [Decimal('90'), b'85', bytearray(b'72.5'), Fraction(181, 2), np.int64(70),
+                  np.float32(65.5), np.bool_(True), [Decimal('1'), 'x'], Decimal('150'), b'zz']
+        path = self.path('grades.gradecols')
+        write_grade_columns(path, grades)
+        decoded = list(open_grade_columns(path).iter_grades())
+        self.assertEqual([type(grade) for grade in decoded], [type(grade) for grade in grades])
+        self.assertEqual(decoded, grades)
+        self.assertEqual(decoded[4].dtype, np.int64)
+
+        result, _ = process_grade_file(path)
+        self.assertEqual([entry['value'] for entry in result['warnings']['invalid_entries']],
+                         [[Decimal('1'), 'x'], Decimal('150'), b'zz'])
+        assert_results_match(self, result, process_grades(grades))
+
+        for grade in ((85,), {'grade': 85}, 85j):
+            with self.subTest(grade=grade), self.assertRaises(TypeError):
+                write_grade_columns(path, [85, grade])
+
+    def test_columns_match_process_grades(self):
+        grades = [85, 'A', None, 101.5, 'B-', 0, 100, float('inf'), 'x', 59.99] * 40
+        expected = process_grades(grades, max_students=None)
+        path = self.path('grades.gradecols')
+        write_grade_columns(path, grades)
+
+        for chunk_size in (3, 64, 100000):
+            with self.subTest(chunk_size=chunk_size):
+                result, report = process_grade_file(path, chunk_size=chunk_size)
+                self.assertEqual(report['format'], 'columns')
+                assert_results_match(self, result, expected)
+
+    def test_identical_warning_uses_original_tokens(self):
+        for grades in (['85'] * 25, [85] * 24 + [85.0], [None] + ['B'] * 25):
+            with self.subTest(first=grades[0], last=grades[-1]):
+                path = self.path('grades.gradecols')
+                write_grade_columns(path, grades)
+                result, _ = process_grade_file(path, chunk_size=4)
+                assert_results_match(self, result, process_grades(grades))
+
+    def test_grade_distribution(self):
+        grades = [95, 'B+', 'C', 'D-', 40, None, 'zzz', 101] * 10
+        path = self.path('grades.gradecols')
+        write_grade_columns(path, grades)
+        columns = open_grade_columns(path)
+        self.assertEqual(columns.letter_counts(), {'A': 10, 'B': 10, 'C': 10, 'D': 10, 'F': 10})
+        self.assertEqual(columns.grade_distribution(), process_grades(grades)['grade_distribution'])
+
+    def test_without_numpy(self):
+        grades = [85, 'A', None, '', 'x', 150, 72.5] * 10
+        path = self.path('grades.gradecols')
+        write_grade_columns(path, grades)
+        with mock.patch('grade_io.np', None):
+            columns = open_grade_columns(path)
+            self.assertIsInstance(columns.values, memoryview)
+            self.assertEqual(list(columns.iter_grades()), grades)
+            self.assertEqual(columns.letter_counts(), {'A': 10, 'B': 10, 'C': 10, 'D': 0, 'F': 0})
+            result, _ = process_grade_file(path, chunk_size=8)
+        self.assertEqual(result, process_grades(grades))
+
+    def test_float32_columns(self):
+        path = self.path('grades32.gradecols')
+        write_grade_columns(path, [85, 90, 'C'], dtype='<f4')
+        columns = open_grade_columns(path)
+        self.assertEqual(columns.values.dtype, np.dtype('<f4'))
+        self.assertEqual(columns.values.tolist(), [85.0, 90.0, 75.0])
+
+        with self.assertRaises(ValueError):
+            write_grade_columns(path, [85], dtype='<i4')
+
+    def test_empty_file(self):
+        path = self.path('empty.gradecols')
+        write_grade_columns(path, [])
+        result, report = process_grade_file(path)
+        self.assertEqual(result['error_code'], 'EMPTY_LIST')
+        self.assertEqual(report['chunks'], 0)
+
+    def test_rejects_foreign_files(self):
+        path = self.write_csv('grades.csv', [['85']])
+        with self.assertRaises(ValueError):
+            open_grade_columns(path)
+        with open(path, 'rb') as grade_file:
+            self.assertNotEqual(grade_file.read(len(GRADE_COLUMNS_MAGIC)), GRADE_COLUMNS_MAGIC)
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestExtendNumeric(unittest.TestCase):
+    """Test the vectorized accumulator update used for binary chunks."""
+
+    def test_matches_extend(self):
+        grades = [85.0, 92.5, -3.0, 100.0, float('nan'), 59.5, 0.0, 250.0, 71.0] * 20
+        expected = GradeAccumulator()
+        expected.extend(grades)
+
+        actual = GradeAccumulator()
+        for start in range(0, len(grades), 13):
+            actual.extend_numeric(np.array(grades[start:start + 13]))
+
+        for name in ('total_entries', 'valid_count', 'invalid_count', 'highest',
+                     'lowest', 'letter_counts', 'first_value', 'identical'):
+            self.assertEqual(getattr(actual, name), getattr(expected, name), name)
+        self.assertAlmostEqual(actual.total_points, expected.total_points, places=9)
+        self.assertEqual([entry[:2] for entry in actual.invalid_sample],
+                         [entry[:2] for entry in expected.invalid_sample])
+
+    def test_identical_tracking(self):
+        accumulator = GradeAccumulator()
+        accumulator.extend_numeric(np.full(30, 85.0))
+        self.assertTrue(accumulator.identical)
+        self.assertIn('warning', accumulator.result())
+
+        accumulator.extend_numeric(np.array([-0.0]))
+        accumulator.extend_numeric(np.array([85.0]))
+        self.assertFalse(accumulator.identical)
+
+
+def run_ingestion_throughput_test():
+    """Report rows/sec and peak memory for 2,000,000-row CSV and grade column files."""
+    import tracemalloc
+    from grade_datagen import GradeGenerator, write_grade_dataset
+
+    rows = 2_000_000
+
+    print("\n" + "="*50)
+    print("FILE INGESTION TEST (2,000,000 rows)")
+    print("="*50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'grades.csv')
+        write_grade_dataset(csv_path, rows, seed=11)
+        paths = [('CSV', csv_path)]
+
+        if np is not None:
+            for dtype in ('<f8', '<f4'):
+                path = os.path.join(directory, f'grades{dtype[-1]}.gradecols')
+                grades = (grade for chunk in GradeGenerator(seed=11).iter_chunks(rows) for grade in chunk)
+                write_grade_columns(path, grades, dtype=dtype)
+                paths.append((f'columns {dtype}', path))
+
+        for label, path in paths:
+            result, report = process_grade_file(path)
+            # Separate run for memory, tracemalloc slows the Python loops down
+            tracemalloc.start()
+            process_grade_file(path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{label:>13}: {report['rows_per_sec']:>12,.0f} rows/sec, "
+                  f"{report['file_bytes'] / 1024 / 1024:6.1f} MiB file, "
+                  f"peak {peak / 1024 / 1024:5.1f} MiB, average {result['average']}")
+
+
+if __name__ == '__main__':
+    unittest.main(argv=[''], exit=False, verbosity=2)
+    run_ingestion_throughput_test()
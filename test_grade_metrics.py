@@ -0,0 +1,185 @@
+"""
+Tests for the operational metrics of the grade pipeline (grade_metrics.py).
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+
+from chat_and_code_explain import np, process_grades, process_grades_batch
+from grade_datagen import write_grade_dataset
+from grade_io import process_grade_file
+from grade_metrics import (
+    BATCH_SIZE_BUCKETS, LATENCY_BUCKETS, GradeMetrics, MetricsSink, enable_metrics,
+    get_metrics_sink, set_metrics_sink
+)
+from grade_profiling import profile_grades
+
+
+CLASS = [85, 'B+', None, 92.5, 'x', 'A-', 61, 150, '', 'B+']
+
+
+class RecordingSink(MetricsSink):
+    """Sink keeping every observation."""
+
+    def __init__(self):
+        self.calls = []
+        self.batches = []
+
+    def observe_call(self, function, seconds, grades, invalid_codes=None, error_code=None):
+        self.calls.append((function, grades, invalid_codes, error_code))
+
+    def observe_batch(self, classes):
+        self.batches.append(classes)
+
+
+class MetricsTestCase(unittest.TestCase):
+    """Installs a sink for the test and restores the previous one afterwards."""
+
+    def install(self, sink):
+        previous = set_metrics_sink(sink)
+        self.addCleanup(set_metrics_sink, previous)
+        return sink
+
+
+class TestGradeMetrics(unittest.TestCase):
+    """Test the counters, histograms and exporters."""
+
+    def test_counters_and_histograms(self):
+        metrics = GradeMetrics()
+        metrics.observe_call('process_grades', 0.0001, 10, {'MISSING_GRADE': 1, 'INVALID_GRADE': 2})
+        metrics.observe_call('process_grades', 0.3, 5, {'MISSING_GRADE': 3})
+        metrics.observe_call('process_grades', 99.0, 0, None, 'NULL_INPUT')
+        metrics.observe_batch(3)
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['calls'], {'process_grades': 3})
+        self.assertEqual(snapshot['grades'], {'process_grades': 15})
+        self.assertEqual(snapshot['invalid'], {'MISSING_GRADE': 4, 'INVALID_GRADE': 2})
+        self.assertEqual(snapshot['errors'], {('process_grades', 'NULL_INPUT'): 1})
+
+        latency = snapshot['latency']['process_grades']
+        self.assertEqual(len(latency['counts']), len(LATENCY_BUCKETS) + 1)
+        # A value equal to a bound falls in that bucket; 99 s only fits +Inf
+        self.assertEqual(latency['counts'][0], 1)
+        self.assertEqual(latency['counts'][LATENCY_BUCKETS.index(0.5)], 1)
+        self.assertEqual(latency['counts'][-1], 1)
+        self.assertEqual(latency['count'], 3)
+        self.assertEqual(snapshot['batch_sizes']['counts'][BATCH_SIZE_BUCKETS.index(4)], 1)
+
+        metrics.reset()
+        self.assertEqual(metrics.snapshot()['calls'], {})
+
+    def test_threads_write_their_own_shards(self):
+        metrics = GradeMetrics()
+
+        def work():
+            for _ in range(1000):
+                metrics.observe_call('process_grades', 0.001, 2, {'INVALID_GRADE': 1})
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(len(metrics._shards), 4)
+        self.assertEqual(snapshot['calls'], {'process_grades': 4000})
+        self.assertEqual(snapshot['grades'], {'process_grades': 8000})
+        self.assertEqual(snapshot['invalid'], {'INVALID_GRADE': 4000})
+
+    def test_prometheus_text(self):
+        metrics = GradeMetrics()
+        metrics.observe_call('process_grades', 0.002, 10, {'EMPTY_GRADE': 1})
+        metrics.observe_call('process_grades', 0.2, 10, None, 'TOO_MANY_STUDENTS')
+        text = metrics.to_prometheus()
+        lines = text.splitlines()
+
+        self.assertTrue(text.endswith('\n'))
+        self.assertIn('# TYPE grades_calls_total counter', lines)
+        self.assertIn('grades_processed_total{function="process_grades"} 20', lines)
+        self.assertIn('grades_invalid_total{code="EMPTY_GRADE"} 1', lines)
+        self.assertIn('grades_rejected_total{function="process_grades",error_code="TOO_MANY_STUDENTS"} 1',
+                      lines)
+        # Histogram buckets are cumulative and end with +Inf == count
+        self.assertIn('grades_call_duration_seconds_bucket{function="process_grades",le="0.001"} 0', lines)
+        self.assertIn('grades_call_duration_seconds_bucket{function="process_grades",le="0.0025"} 1', lines)
+        self.assertIn('grades_call_duration_seconds_bucket{function="process_grades",le="+Inf"} 2', lines)
+        self.assertIn('grades_call_duration_seconds_count{function="process_grades"} 2', lines)
+        self.assertIn('grades_batch_classes_count 0', lines)
+        for line in lines:
+            if not line.startswith('#'):
+                float(line.rsplit(' ', 1)[1])
+
+    def test_write_prometheus(self):
+        metrics = GradeMetrics()
+        metrics.observe_call('process_grades', 0.01, 3)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'grades.prom')
+            metrics.write_prometheus(path)
+            metrics.write_prometheus(path)
+            self.assertEqual(os.listdir(directory), ['grades.prom'])
+            with open(path, encoding='utf-8') as metrics_file:
+                self.assertEqual(metrics_file.read(), metrics.to_prometheus())
+
+
+class TestInstrumentedFunctions(MetricsTestCase):
+    """Test what the grade functions report to the installed sink."""
+
+    def test_off_by_default(self):
+        self.assertIsNone(get_metrics_sink())
+
+    def test_process_grades(self):
+        sink = self.install(RecordingSink())
+        process_grades(CLASS)
+        process_grades(None)
+        process_grades(CLASS, max_students=5)
+
+        self.assertEqual(sink.calls, [
+            ('process_grades', 10, {'MISSING_GRADE': 1, 'EMPTY_GRADE': 1, 'INVALID_GRADE': 2}, None),
+            ('process_grades', 0, None, 'NULL_INPUT'),
+            ('process_grades', 10, None, 'TOO_MANY_STUDENTS'),
+        ])
+
+    def test_results_are_unchanged(self):
+        expected = [process_grades(CLASS), process_grades(CLASS, compact=True).to_dict(), process_grades('x')]
+        self.install(GradeMetrics())
+        with profile_grades() as profiler:
+            results = [process_grades(CLASS), process_grades(CLASS, compact=True).to_dict(), process_grades('x')]
+        self.assertEqual(results, expected)
+        self.assertEqual(profiler.to_dict()['process_grades']['calls'], 3)
+        self.assertEqual(get_metrics_sink().snapshot()['calls'], {'process_grades': 3})
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_process_grades_batch(self):
+        sink = self.install(RecordingSink())
+        process_grades_batch([CLASS, CLASS, [70, 80]])
+        self.assertEqual(sink.batches, [3])
+        self.assertEqual(sink.calls, [
+            ('process_grades_batch', 22, {'MISSING_GRADE': 2, 'EMPTY_GRADE': 2, 'INVALID_GRADE': 4}, None),
+        ])
+
+    def test_process_grade_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'grades.csv')
+            write_grade_dataset(path, 1000, seed=3)
+            sink = self.install(RecordingSink())
+            result, report = process_grade_file(path, chunk_size=300)
+
+        [(function, grades, invalid_codes, error_code)] = sink.calls
+        self.assertEqual((function, grades, error_code), ('process_grade_file', 1000, None))
+        self.assertEqual(sum(invalid_codes.values()), result['validation_stats']['invalid_count'])
+
+    def test_enable_metrics(self):
+        previous = get_metrics_sink()
+        self.addCleanup(set_metrics_sink, previous)
+        metrics = enable_metrics()
+        self.assertIs(get_metrics_sink(), metrics)
+        process_grades(CLASS)
+        self.assertEqual(metrics.snapshot()['grades'], {'process_grades': 10})
+
+
+if __name__ == '__main__':
+    unittest.main()
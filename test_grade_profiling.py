@@ -0,0 +1,178 @@
+"""
+Tests for the per-stage grade profiler (grade_profiling.py).
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from chat_and_code_explain import clear_conversion_cache, process_grades, process_grades_parallel
+from grade_datagen import write_grade_dataset
+from grade_io import process_grade_file
+from grade_profiling import (
+    ACTIVE_PROFILER, NULL_STAGE, GradeProfiler, active_stage, format_profile, profile_grades
+)
+
+
+GRADES = [85, 'B+', None, 92.5, 'x', 'A-', 61, 150, '', 'B+'] * 30
+
+
+class TestGradeProfiler(unittest.TestCase):
+    """Test recording, the dict view and the Chrome trace export."""
+
+    def test_stages(self):
+        profiler = GradeProfiler()
+        for items in (10, 30):
+            with profiler.stage('convert', items) as stage:
+                stage.count(cache_hits=2)
+        with self.assertRaises(ZeroDivisionError):
+            with profiler.stage('broken'):
+                1 / 0
+        profiler.record('read', 1_000, 3_000, items=4)
+
+        profile = profiler.to_dict()
+        self.assertEqual(list(profile), ['convert', 'broken', 'read'])
+        self.assertEqual(profile['convert']['calls'], 2)
+        self.assertEqual(profile['convert']['items'], 40)
+        self.assertEqual(profile['convert']['cache_hits'], 4)
+        self.assertEqual(profile['broken']['items_per_sec'], 0.0)
+        self.assertEqual(profile['read']['seconds'], 2e-6)
+        self.assertEqual(profile['read']['items_per_sec'], 4 / 2e-6)
+        self.assertIn('convert', format_profile(profile))
+
+        profiler.reset()
+        self.assertEqual(profiler.to_dict(), {})
+
+    def test_iterate(self):
+        profiler = GradeProfiler()
+        chunks = [[1, 2], [3], [4, 5, 6]]
+        self.assertEqual(list(profiler.iterate('read', chunks)), chunks)
+        self.assertEqual(profiler.to_dict()['read']['calls'], 3)
+        self.assertEqual(profiler.to_dict()['read']['items'], 6)
+
+    def test_chrome_trace(self):
+        profiler = GradeProfiler(max_events=2)
+        with profiler.stage('outer', 5):
+            with profiler.stage('inner', 5):
+                pass
+        with profiler.stage('outer'):
+            pass
+
+        trace = profiler.to_chrome_trace()
+        events = trace['traceEvents']
+        self.assertEqual([event['name'] for event in events], ['inner', 'outer'])
+        self.assertTrue(all(event['ph'] == 'X' for event in events))
+        inner, outer = events
+        self.assertLessEqual(outer['ts'], inner['ts'])
+        self.assertGreaterEqual(outer['ts'] + outer['dur'], inner['ts'] + inner['dur'])
+        self.assertEqual(inner['args'], {'items': 5})
+        # Only the trace is capped, the totals count every run
+        self.assertEqual(trace['otherData']['dropped_events'], 1)
+        self.assertEqual(profiler.to_dict()['outer']['calls'], 2)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.json')
+            profiler.save_chrome_trace(path)
+            with open(path, encoding='utf-8') as trace_file:
+                self.assertEqual(json.load(trace_file), json.loads(json.dumps(trace)))
+
+    def test_threads_share_a_profiler(self):
+        profiler = GradeProfiler()
+
+        def work():
+            for _ in range(500):
+                with profiler.stage('work', 1):
+                    pass
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(profiler.to_dict()['work']['calls'], 2000)
+
+
+class TestProfileGrades(unittest.TestCase):
+    """Test the instrumented grade functions."""
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(ACTIVE_PROFILER.get())
+        self.assertIs(active_stage('anything', 10), NULL_STAGE)
+        with active_stage('anything') as stage:
+            stage.items = 5
+            stage.count(hits=1)
+
+    def test_process_grades_stages(self):
+        clear_conversion_cache()
+        with profile_grades() as profiler:
+            result = process_grades(GRADES)
+            process_grades('not a list')
+        self.assertIsNone(ACTIVE_PROFILER.get())
+        self.assertEqual(result, process_grades(GRADES))
+
+        profile = profiler.to_dict()
+        self.assertEqual(set(profile), {'process_grades', 'validate_input', 'accumulate', 'build_result'})
+        self.assertEqual(profile['process_grades']['calls'], 2)
+        self.assertEqual(profile['validate_input']['calls'], 2)
+        self.assertEqual(profile['accumulate']['calls'], 1)
+        self.assertEqual(profile['accumulate']['items'], len(GRADES))
+        # 'B+' (twice per repetition), None, 'x', 'A-' and '' go through the cache
+        self.assertEqual(profile['accumulate']['cache_misses'], 5)
+        self.assertEqual(profile['accumulate']['cache_hits'], 6 * 30 - 5)
+        self.assertLessEqual(profile['accumulate']['seconds'], profile['process_grades']['seconds'])
+
+    def test_error_results_are_profiled(self):
+        with profile_grades() as profiler:
+            result = process_grades(GRADES, max_students=10)
+        self.assertEqual(result['error_code'], 'TOO_MANY_STUDENTS')
+        self.assertNotIn('accumulate', profiler.to_dict())
+
+    def test_shared_profiler(self):
+        profiler = GradeProfiler()
+        for _ in range(3):
+            with profile_grades(profiler):
+                process_grades(GRADES)
+        self.assertEqual(profiler.to_dict()['process_grades']['calls'], 3)
+
+    def test_parallel_stages(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(2) as executor, profile_grades() as profiler:
+            process_grades_parallel(GRADES, workers=2, executor=executor)
+        profile = profiler.to_dict()
+        self.assertEqual(list(profile), ['split', 'workers', 'merge', 'build_result'])
+        self.assertEqual(profile['merge']['items'], 2)
+
+    def test_grade_file_stages(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for file_format in ('csv', 'columns'):
+                with self.subTest(file_format=file_format):
+                    path = os.path.join(directory, f'grades.{file_format}')
+                    write_grade_dataset(path, 2500, file_format)
+                    with profile_grades() as profiler:
+                        process_grade_file(path, chunk_size=1000)
+                    profile = profiler.to_dict()
+                    self.assertEqual(profile['read_chunk']['calls'], 3)
+                    self.assertEqual(profile['read_chunk']['items'], 2500)
+                    self.assertEqual(profile['accumulate']['items'], 2500)
+                    self.assertEqual(profile['build_result']['calls'], 1)
+
+    def test_concurrent_tasks_are_separate(self):
+        async def profiled(count):
+            with profile_grades() as profiler:
+                for _ in range(count):
+                    process_grades(GRADES)
+                    await asyncio.sleep(0)
+            return profiler.to_dict()['process_grades']['calls']
+
+        async def main():
+            return await asyncio.gather(profiled(2), profiled(5))
+
+        self.assertEqual(asyncio.run(main()), [2, 5])
+
+
+if __name__ == '__main__':
+    unittest.main()
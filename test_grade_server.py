@@ -0,0 +1,210 @@
+"""
+Tests for the local HTTP grading service (grade_server.py).
+"""
+
+import http.client
+import json
+import threading
+import unittest
+from urllib.parse import urlsplit
+
+from chat_and_code_explain import get_grade_summary, process_grades
+from grade_metrics import GradeMetrics, set_metrics_sink
+from grade_server import MicroBatcher, percentile, run_load_test, start_grade_server
+
+
+CLASS = [85, 'B+', None, 92.5, 'x', 'A-', 61, 150]
+
+
+class TestGradeServer(unittest.TestCase):
+    """Exercise the endpoints over a real keep-alive connection."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = start_grade_server()
+        address = urlsplit(cls.server.url)
+        cls.host, cls.port = address.hostname, address.port
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=10)
+        self.addCleanup(self.connection.close)
+
+    def post(self, path, body, content_type='application/json'):
+        if not isinstance(body, (str, bytes)):
+            body = json.dumps(body)
+        self.connection.request('POST', path, body, {'Content-Type': content_type})
+        response = self.connection.getresponse()
+        return response, response.read()
+
+    def test_json_grades(self):
+        for body in (CLASS, {'grades': CLASS}):
+            with self.subTest(body=type(body).__name__):
+                response, data = self.post('/grades', body)
+                self.assertEqual(response.status, 200)
+                self.assertEqual(json.loads(data), process_grades(CLASS))
+
+    def test_limits_and_errors(self):
+        response, data = self.post('/grades', {'grades': CLASS, 'max_students': 5})
+        self.assertEqual(response.status, 422)
+        self.assertEqual(json.loads(data), process_grades(CLASS, max_students=5))
+
+        response, data = self.post('/grades?min_students=10', CLASS)
+        self.assertEqual(json.loads(data)['error_code'], 'TOO_FEW_STUDENTS')
+
+        response, data = self.post('/grades', {'grades': 'abc'})
+        self.assertEqual(json.loads(data)['error_code'], 'INVALID_TYPE')
+
+        response, data = self.post('/grades', '{not json')
+        self.assertEqual(response.status, 400)
+        self.assertEqual(json.loads(data)['error_code'], 'BAD_REQUEST')
+
+        response, _ = self.post('/nowhere', CLASS)
+        self.assertEqual(response.status, 404)
+
+    def test_bad_json_limits(self):
+        response, data = self.post('/grades', {'grades': CLASS, 'max_students': '10', 'min_students': None})
+        self.assertEqual(response.status, 400)
+        self.assertEqual(json.loads(data)['error_code'], 'BAD_REQUEST')
+
+        for limits in ({'max_students': [1]}, {'min_students': 'abc'}, {'max_students': {}}):
+            with self.subTest(limits=limits):
+                response, data = self.post('/grades', {'grades': [85, 90], **limits})
+                self.assertEqual(response.status, 400)
+                self.assertEqual(json.loads(data)['error_code'], 'BAD_REQUEST')
+
+        # Numeric strings and a null max_students are accepted
+        response, data = self.post('/grades', {'grades': CLASS, 'max_students': None, 'min_students': '2'})
+        self.assertEqual(json.loads(data), process_grades(CLASS, max_students=None, min_students=2))
+
+        # The batcher is still serving requests
+        self.assertTrue(self.server.batcher._thread.is_alive())
+        response, data = self.post('/grades', CLASS)
+        self.assertEqual(json.loads(data), process_grades(CLASS))
+
+    def test_csv_grades(self):
+        response, data = self.post('/grades', '85\nB+\n\n92.5\nx\n', 'text/csv')
+        self.assertEqual(json.loads(data), process_grades(['85', 'B+', None, '92.5', 'x']))
+
+        csv_body = 'student,grade\nann,85\nbob,A-\ncy,\n'
+        response, data = self.post('/grades?column=grade&header=1', csv_body, 'text/csv')
+        self.assertEqual(json.loads(data), process_grades(['85', 'A-', '']))
+
+        response, data = self.post('/grades?column=score&header=1', csv_body, 'text/csv')
+        self.assertEqual(response.status, 400)
+
+    def test_summary(self):
+        response, data = self.post('/summary', CLASS)
+        expected = process_grades(CLASS)
+        self.assertEqual(json.loads(data), {'summary': get_grade_summary(expected), 'result': expected})
+
+    def test_batch_streams_ndjson(self):
+        classes = [CLASS, [90, 'A'], [], 'nope', ['C'] * 30]
+        response, data = self.post('/batch', classes)
+        self.assertEqual(response.getheader('Transfer-Encoding'), 'chunked')
+        self.assertEqual(response.getheader('Content-Type'), 'application/x-ndjson')
+        lines = data.decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [process_grades(grades) for grades in classes])
+
+        response, data = self.post('/batch', {'grades': CLASS})
+        self.assertEqual(response.status, 400)
+
+    def test_keep_alive(self):
+        for _ in range(3):
+            self.post('/grades', CLASS)
+        sock = self.connection.sock
+        self.post('/grades', CLASS)
+        self.assertIs(self.connection.sock, sock)
+
+        self.connection.request('GET', '/health')
+        health = json.loads(self.connection.getresponse().read())
+        self.assertEqual(health['status'], 'ok')
+        self.assertGreaterEqual(health['batcher']['classes'], 4)
+
+        # Metrics are only served when the server was given some
+        self.connection.request('GET', '/metrics')
+        response = self.connection.getresponse()
+        response.read()
+        self.assertEqual(response.status, 404)
+
+    def test_metrics_endpoint(self):
+        metrics = GradeMetrics()
+        previous = set_metrics_sink(metrics)
+        self.addCleanup(set_metrics_sink, previous)
+        server = start_grade_server(metrics=metrics)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        connection = http.client.HTTPConnection(self.host, urlsplit(server.url).port, timeout=10)
+        self.addCleanup(connection.close)
+        connection.request('POST', '/grades', json.dumps(CLASS), {'Content-Type': 'application/json'})
+        connection.getresponse().read()
+        connection.request('GET', '/metrics')
+        response = connection.getresponse()
+        text = response.read().decode('utf-8')
+        self.assertEqual(response.status, 200)
+        self.assertTrue(response.getheader('Content-Type').startswith('text/plain; version=0.0.4'))
+        self.assertIn('grades_calls_total{function="process_grades_batch"} 1', text)
+        self.assertIn('grades_invalid_total{code="MISSING_GRADE"} 1', text)
+        self.assertIn('grades_batch_classes_count 1', text)
+
+    def test_load_test_client(self):
+        report = run_load_test(self.server.url, [CLASS, [70, 'B']], requests=40, concurrency=4)
+        self.assertEqual(report['requests'], 40)
+        self.assertEqual(report['errors'], 0)
+        self.assertGreater(report['requests_per_sec'], 0)
+        self.assertLessEqual(report['p50_ms'], report['p99_ms'])
+
+
+class TestMicroBatcher(unittest.TestCase):
+    """Test batching of classes submitted from many threads."""
+
+    def test_concurrent_submissions_are_batched(self):
+        batcher = MicroBatcher(max_batch=8, max_delay=0.05)
+        classes = [[70 + i, 'B', None] for i in range(16)]
+        results = [None] * len(classes)
+
+        def submit(index):
+            limits = (1000, 1) if index % 2 else (1000, 5)
+            results[index] = batcher.submit(classes[index], *limits)
+
+        threads = [threading.Thread(target=submit, args=(index,)) for index in range(len(classes))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for index, grades in enumerate(classes):
+            limits = (1000, 1) if index % 2 else (1000, 5)
+            self.assertEqual(results[index], process_grades(grades, *limits))
+        stats = batcher.stats()
+        self.assertEqual(stats['classes'], 16)
+        self.assertLess(stats['batches'], 16)
+        self.assertLessEqual(stats['largest_batch'], 8)
+
+    def test_failed_batch_keeps_worker_alive(self):
+        batcher = MicroBatcher()
+        # An unhashable limit breaks the grouping of the whole batch
+        with self.assertRaises(TypeError):
+            batcher.submit([85, 90], [1], 1)
+        self.assertTrue(batcher._thread.is_alive())
+        self.assertEqual(batcher.submit([85, 90]), process_grades([85, 90]))
+
+    def test_non_list_input_skips_batching(self):
+        batcher = MicroBatcher()
+        self.assertEqual(batcher.submit(None), process_grades(None))
+        self.assertEqual(batcher.stats()['batches'], 0)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.50), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([], 0.99), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,195 @@
+"""
+Tests for the asyncio grade processing front end (grade_service.py).
+"""
+
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from chat_and_code_explain import process_grades
+from grade_service import GradeService, close_default_service, get_default_service, process_grades_async
+
+
+LARGE_CLASS = [85, 'B+', None, 92.5, 'x', 'A-', 61, 150] * 500   # 4,000 entries
+
+
+class GatedExecutor(ThreadPoolExecutor):
+    """Thread pool whose tasks wait for a gate and record how many ran at once."""
+
+    def __init__(self, max_workers=8):
+        super().__init__(max_workers=max_workers)
+        self.gate = threading.Event()
+        self.lock = threading.Lock()
+        self.started = 0
+        self.running = 0
+        self.peak = 0
+
+    def submit(self, fn, *args, **kwargs):
+        def gated():
+            with self.lock:
+                self.started += 1
+                self.running += 1
+                self.peak = max(self.peak, self.running)
+            try:
+                self.gate.wait(timeout=10)
+                return fn(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.running -= 1
+        return super().submit(gated)
+
+
+class TestGradeService(unittest.IsolatedAsyncioTestCase):
+    """Test inline handling, offloading, backpressure and cancellation."""
+
+    async def asyncSetUp(self):
+        self.executor = GatedExecutor()
+        self.addCleanup(self.executor.shutdown, wait=False, cancel_futures=True)
+        self.addCleanup(self.executor.gate.set)
+        self.service = GradeService(workers=2, inline_threshold=100, max_pending=2,
+                                    executor=self.executor)
+
+    async def test_small_inputs_run_inline(self):
+        for grades in ([85, 'A', None], 'not a list', [], [85] * 100):
+            with self.subTest(grades=grades if len(grades) < 10 else '100 grades'):
+                self.assertEqual(await self.service.process_grades(grades), process_grades(grades))
+        self.assertEqual(self.executor.started, 0)
+        self.assertEqual(self.service.stats()['inline'], 4)
+
+    async def test_size_errors_run_inline(self):
+        result = await self.service.process_grades(LARGE_CLASS, max_students=1000)
+        self.assertEqual(result['error_code'], 'TOO_MANY_STUDENTS')
+        self.assertEqual(self.executor.started, 0)
+
+    async def test_large_inputs_are_offloaded(self):
+        self.executor.gate.set()
+        result = await self.service.process_grades(LARGE_CLASS, max_students=None, compact=True)
+        self.assertEqual(result, process_grades(LARGE_CLASS, max_students=None, compact=True))
+        self.assertEqual(self.executor.started, 1)
+        self.assertEqual(self.service.stats()['offloaded'], 1)
+
+    async def test_default_arguments_offload(self):
+        """Classes between the default inline threshold and max_students go to the pool."""
+        self.executor.gate.set()
+        grades = LARGE_CLASS[:800]
+        service = GradeService(executor=self.executor)
+        self.assertEqual(await service.process_grades(grades), process_grades(grades))
+        self.assertEqual(service.stats()['offloaded'], 1)
+        self.assertEqual(self.executor.started, 1)
+
+    async def test_backpressure_limits_pending_requests(self):
+        tasks = [asyncio.create_task(self.service.process_grades(LARGE_CLASS, max_students=None))
+                 for _ in range(6)]
+        await asyncio.sleep(0.05)
+        stats = self.service.stats()
+        self.assertEqual(stats['in_flight'], 2)
+        self.assertEqual(stats['waiting'], 4)
+
+        self.executor.gate.set()
+        results = await asyncio.gather(*tasks)
+        self.assertEqual(self.executor.peak, 2)
+        self.assertEqual(self.executor.started, 6)
+        self.assertTrue(all(result == results[0] for result in results))
+
+    async def test_cancellation_releases_slots(self):
+        running = [asyncio.create_task(self.service.process_grades(LARGE_CLASS, max_students=None))
+                   for _ in range(2)]
+        waiting = asyncio.create_task(self.service.process_grades(LARGE_CLASS, max_students=None))
+        await asyncio.sleep(0.05)
+
+        waiting.cancel()
+        running[0].cancel()
+        for task in (waiting, running[0]):
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        self.assertEqual(self.service.stats()['in_flight'], 1)
+        self.assertEqual(self.service.stats()['waiting'], 0)
+
+        # The cancelled slot can be used again
+        self.executor.gate.set()
+        result = await self.service.process_grades(LARGE_CLASS, max_students=None)
+        self.assertEqual(result, await running[1])
+        self.assertEqual(self.service.stats()['cancelled'], 1)
+
+
+class TestProcessGradesAsync(unittest.TestCase):
+    """Test the module-level API with a real process pool."""
+
+    def test_default_service_across_event_loops(self):
+        service = get_default_service()
+        try:
+            for _ in range(2):
+                result = asyncio.run(process_grades_async(LARGE_CLASS, max_students=None))
+                self.assertEqual(result, process_grades(LARGE_CLASS, max_students=None))
+            # Default arguments: a full-size class still goes to the pool
+            result = asyncio.run(process_grades_async(LARGE_CLASS[:1000]))
+            self.assertEqual(result, process_grades(LARGE_CLASS[:1000]))
+            executor = service._executor
+        finally:
+            asyncio.run(close_default_service())
+        self.assertGreaterEqual(service.stats()['offloaded'], 3)
+
+        # The pool is shut down and the next call gets a new shared service
+        self.assertIsNone(service._executor)
+        with self.assertRaises(RuntimeError):
+            executor.submit(len, [])
+        self.assertIsNot(get_default_service(), service)
+        asyncio.run(close_default_service())
+
+
+def run_async_concurrency_test():
+    """Compare event loop responsiveness and throughput with and without GradeService."""
+    import random
+    import time
+    from grade_datagen import generate_grades
+
+    sizes = random.Random(3).choices([30, 500, 50_000, 200_000], weights=[60, 30, 8, 2], k=200)
+    requests = [generate_grades(size, seed=seed) for seed, size in enumerate(sizes)]
+
+    async def measure(handler):
+        lags = []
+        stop = asyncio.Event()
+
+        async def heartbeat():
+            while not stop.is_set():
+                start_time = time.perf_counter()
+                await asyncio.sleep(0.001)
+                lags.append(time.perf_counter() - start_time - 0.001)
+
+        monitor = asyncio.create_task(heartbeat())
+        start_time = time.perf_counter()
+        await asyncio.gather(*(handler(grades) for grades in requests))
+        elapsed = time.perf_counter() - start_time
+        stop.set()
+        await monitor
+        return elapsed, max(lags, default=0.0)
+
+    async def blocking(grades):
+        return process_grades(grades, max_students=None)
+
+    async def main():
+        async with GradeService() as service:
+            # Start the workers before timing
+            await asyncio.gather(*(service.process_grades(requests[0] * 100, max_students=None)
+                                   for _ in range(service.workers)))
+            results = [('process_grades in the coroutine', await measure(blocking)),
+                       ('GradeService', await measure(
+                           lambda grades: service.process_grades(grades, max_students=None)))]
+            return results, service.stats()
+
+    print("\n" + "="*50)
+    print(f"ASYNC CONCURRENCY TEST ({len(requests)} concurrent requests, "
+          f"{sum(map(len, requests)):,} grades)")
+    print("="*50)
+
+    results, stats = asyncio.run(main())
+    for label, (elapsed, lag) in results:
+        print(f"{label:>32}: {elapsed:.3f}s, {len(requests) / elapsed:7.1f} req/s, "
+              f"worst event loop stall {lag * 1000:7.1f} ms")
+    print(f"Service counters: {stats}")
+
+
+if __name__ == '__main__':
+    unittest.main(argv=[''], exit=False, verbosity=2)
+    run_async_concurrency_test()
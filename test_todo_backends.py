@@ -0,0 +1,224 @@
+"""
+Tests for the durable todo backends (todo_backends.py).
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import bar
+from bar import TodoStore
+from todo_backends import LogBackend, SQLiteTodoStore
+
+
+def fill(store):
+    """Add, complete and remove a few todos; returns the expected todos."""
+    for number in range(10):
+        store.add(f"Task {number}", ("low", "high")[number % 2])
+    store.mark_completed(2)
+    store.mark_completed(5)
+    store.remove(3)
+    store.remove(5)
+    return [dict(todo) for todo in store]
+
+
+class TestLogBackend(unittest.TestCase):
+    """Test logging, recovery, batched syncs and compaction."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def reopen(self, **options):
+        store = TodoStore(backend=LogBackend(self.directory, **options))
+        self.addCleanup(store.close)
+        return store
+
+    def test_recovery_from_log(self):
+        store = TodoStore(backend=LogBackend(self.directory))
+        expected = fill(store)[:-1]
+        store.remove(10)
+        store.close()
+
+        reopened = self.reopen()
+        self.assertEqual(list(reopened), expected)
+        self.assertEqual([todo["id"] for todo in reopened.list("completed")], [2])
+        self.assertEqual(len(reopened.by_priority("high")), 4)
+        # Removed IDs are not given out again after a restart
+        self.assertEqual(reopened.add("New")["id"], 11)
+
+    def test_compaction(self):
+        store = TodoStore(backend=LogBackend(self.directory, compact_every=5))
+        expected = fill(store)
+        self.assertTrue(os.path.exists(store.backend.snapshot_path))
+        self.assertLess(store.backend.logged, 5)
+        store.close()
+        self.assertEqual(list(self.reopen()), expected)
+
+    def test_clear_is_saved(self):
+        store = TodoStore(backend=LogBackend(self.directory))
+        fill(store)
+        store.clear()
+        store.add("After clear")
+        store.close()
+        self.assertEqual([(todo["id"], todo["task"]) for todo in self.reopen()], [(11, "After clear")])
+
+    def test_torn_last_line_is_dropped(self):
+        store = TodoStore(backend=LogBackend(self.directory))
+        expected = fill(store)
+        store.close()
+        with open(os.path.join(self.directory, 'operations.log'), 'ab') as log_file:
+            log_file.write(b'["add",11,"Half writ')
+
+        store = self.reopen()
+        self.assertEqual(list(store), expected)
+        store.add("Next")
+        store.close()
+        self.assertEqual(list(self.reopen())[-1]["task"], "Next")
+
+    def test_stale_log_after_snapshot_is_harmless(self):
+        """A crash between writing the snapshot and emptying the log replays old changes again."""
+        store = TodoStore(backend=LogBackend(self.directory))
+        expected = fill(store)
+        store.close()
+        log_path = os.path.join(self.directory, 'operations.log')
+        with open(log_path, 'rb') as log_file:
+            old_log = log_file.read()
+
+        store = self.reopen()
+        store.compact()
+        store.close()
+        with open(log_path, 'wb') as log_file:
+            log_file.write(old_log)
+        self.assertEqual(list(self.reopen()), expected)
+
+    def test_crash_while_clearing(self):
+        """A crash between writing the empty snapshot and emptying the log keeps the clear."""
+        store = TodoStore(backend=LogBackend(self.directory))
+        self.addCleanup(store.close)
+        for task in ("a", "b", "c"):
+            store.add(task)
+        store.backend.sync()
+        with mock.patch('todo_backends._sync_directory', side_effect=OSError("crash")), \
+                self.assertRaises(OSError):
+            store.clear()
+
+        reopened = self.reopen()
+        self.assertEqual(list(reopened), [])
+        self.assertEqual(reopened.add("d")["id"], 4)
+
+    def test_batched_fsync(self):
+        with mock.patch('todo_backends.os.fsync') as fsync:
+            store = TodoStore(backend=LogBackend(self.directory, sync_every=4, sync_interval=3600))
+            for number in range(10):
+                store.add(f"Task {number}")
+            self.assertEqual(fsync.call_count, 2)
+            store.close()
+            self.assertEqual(fsync.call_count, 3)
+
+    def test_bulk_operations_are_logged(self):
+        store = TodoStore(backend=LogBackend(self.directory, compact_every=50))
+        store.add_many((f"Task {number}", "low") for number in range(120))
+        self.assertEqual(store.mark_completed_many([1, 2, 500]), [500])
+        self.assertEqual(store.remove_many(range(100, 130)), list(range(121, 130)))
+        expected = list(store)
+        store.close()
+        self.assertEqual(list(self.reopen()), expected)
+
+    def test_idle_changes_are_synced(self):
+        with mock.patch('todo_backends.os.fsync') as fsync:
+            store = TodoStore(backend=LogBackend(self.directory, sync_every=1000, sync_interval=0.05))
+            store.add("Only change")
+            deadline = time.monotonic() + 5
+            while not fsync.called and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(fsync.call_count, 1)
+            self.assertEqual(store.backend._unsynced, 0)
+            store.close()
+            self.assertEqual(fsync.call_count, 1)
+
+    def test_unknown_operation(self):
+        with open(os.path.join(self.directory, 'operations.log'), 'wb') as log_file:
+            log_file.write(b'["rename",1,"x"]\n')
+        with self.assertRaises(ValueError):
+            LogBackend(self.directory).load()
+
+
+class TestSQLiteTodoStore(unittest.TestCase):
+    """Test the SQLite store against the in-memory TodoStore."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'todos.db')
+
+    def open(self):
+        store = SQLiteTodoStore(self.path)
+        self.addCleanup(store.close)
+        return store
+
+    def test_same_results_as_todo_store(self):
+        store, memory = self.open(), TodoStore()
+        self.assertEqual(fill(store), fill(memory))
+        for filter_by in ("all", "completed", "pending"):
+            self.assertEqual(store.list(filter_by), memory.list(filter_by))
+        for priority in ("low", "high", "urgent"):
+            self.assertEqual(store.by_priority(priority), memory.by_priority(priority))
+        self.assertEqual(store.get(4), memory.get(4))
+        self.assertIsNone(store.get(3))
+        self.assertIsNone(store.remove(3))
+        self.assertIsNone(store.mark_completed(3))
+        self.assertEqual(store.mark_completed(2), memory.mark_completed(2))
+        self.assertEqual(len(store), len(memory))
+        self.assertIn(4, store)
+
+    def test_bulk_operations(self):
+        store, memory = self.open(), TodoStore()
+        tasks = [(f"Task {number}", ("low", "high")[number % 2]) for number in range(1200)]
+        self.assertEqual(store.add_many(tasks), memory.add_many(tasks))
+        ids = [5, 5, 3000, *range(600, 1250)]
+        self.assertEqual(store.mark_completed_many(ids), memory.mark_completed_many(ids))
+        ids = [7, 7, 5, 3000, *range(1100, 1250)]
+        self.assertEqual(store.remove_many(ids), memory.remove_many(ids))
+        self.assertEqual(list(store), list(memory))
+
+    def test_persistence_and_ids(self):
+        store = self.open()
+        self.assertEqual(store.add_many([("a", "low"), ("b", "high"), ("c", "medium")]), 3)
+        store.mark_completed(1)
+        store.remove(3)
+        store.close()
+
+        store = self.open()
+        self.assertEqual([(todo["id"], todo["completed"]) for todo in store], [(1, True), (2, False)])
+        self.assertEqual(store.add("d")["id"], 4)
+        store.clear()
+        self.assertEqual(len(store), 0)
+        self.assertEqual(store.add("e")["id"], 5)
+
+    def test_queries_use_indexes(self):
+        store = self.open()
+        connection = store._connection
+        connection.row_factory = None
+        for query, parameters in (("WHERE completed = 1", ()), ("WHERE priority = ?", ("high",))):
+            plan = connection.execute(f"EXPLAIN QUERY PLAN SELECT * FROM todos {query} ORDER BY id",
+                                      parameters).fetchall()
+            self.assertIn("USING INDEX", plan[0][-1])
+            self.assertNotIn("TEMP B-TREE", " ".join(row[-1] for row in plan))
+
+    def test_bar_functions(self):
+        with mock.patch.object(bar, "todos", self.open()), contextlib.redirect_stdout(io.StringIO()) as output:
+            bar.add_todo("Buy groceries", "high")
+            bar.mark_completed(1)
+            bar.list_todos("completed")
+            self.assertEqual([todo["task"] for todo in bar.get_todos_by_priority("high")], ["Buy groceries"])
+        self.assertIn("[✓] Buy groceries (ID: 1, Priority: high)", output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
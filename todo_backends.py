@@ -0,0 +1,583 @@
+"""
+Durable storage backends for bar.TodoStore.
+
+A backend is given every change a TodoStore makes and hands the saved todos
+back when a store is created on it:
+
+    load()              -> (todos in the order they were added, last ID used)
+    added(todo)         -> True when the store should call compact()
+    completed(todo_id)  -> likewise
+    removed(todo_id)    -> likewise
+    cleared()           (the store compacts right after)
+    compact(todos, last_id)
+    sync()
+    close()
+
+LogBackend appends every change to an operation log and fsyncs it in
+batches. Every compact_every changes the store writes a snapshot of its
+todos and the log starts over, so startup reads the snapshot plus a short
+log instead of the whole history.
+
+SQLiteTodoStore is a drop-in replacement for TodoStore itself that keeps
+the todos in a SQLite database and answers filters with indexed queries,
+for lists too large to hold in memory.
+
+Example:
+    store = TodoStore(backend=LogBackend('todo_data'))
+    store.add("Buy groceries", "high")
+    store.close()
+"""
+
+import contextlib
+import gc
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+SNAPSHOT_FILE = 'snapshot.json'
+LOG_FILE = 'operations.log'
+
+
+class LogBackend:
+    """
+    Append-only operation log with batched fsync and snapshot compaction.
+
+    The log has one JSON line per change: ["add", id, task, priority],
+    ["complete", id], ["remove", id] or ["clear"]. Lines are written through a buffer
+    and made durable with one fsync per sync_every changes or sync_interval
+    seconds, whichever comes first, so a crash loses at most that batch. A
+    timer thread does the interval fsync, so it also happens when the store
+    goes idle after a change.
+    A torn last line (a crash in the middle of a write) is dropped when
+    the log is loaded.
+
+    compact() writes the snapshot atomically (temporary file, fsync,
+    rename) and only then empties the log. If a crash leaves the old log
+    next to the new snapshot, replaying it again changes nothing: IDs are
+    never reused, so the last change to each ID always wins, and a clear is
+    logged (and synced) before its empty snapshot is written, so replaying
+    it drops every todo added before it.
+    """
+
+    def __init__(self, directory, sync_every=1000, sync_interval=1.0, compact_every=100_000):
+        """
+        Args:
+            directory (str): Directory for the snapshot and the log (created if missing)
+            sync_every (int): Changes per fsync of the log (1 syncs every change)
+            sync_interval (float): Longest time in seconds a change may wait for an fsync
+            compact_every (int): Changes logged before the store is asked to compact
+                (None to compact only when compact() is called)
+        """
+        self.directory = directory
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.compact_every = compact_every
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.log_path = os.path.join(directory, LOG_FILE)
+        os.makedirs(directory, exist_ok=True)
+
+        self._log = None
+        self._unsynced = 0         # changes written since the last fsync
+        self._timer = None         # pending interval sync, if any
+        self._lock = threading.Lock()  # the timer syncs from its own thread
+        self.logged = 0            # changes in the log since the last snapshot
+
+    def load(self):
+        """
+        Read the snapshot and replay the log after it.
+
+        Returns:
+            tuple: (list of todo dicts in the order they were added, last ID used)
+        """
+        with _gc_paused():
+            return self._load()
+
+    def _load(self):
+        todos = {}
+        last_id = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding='utf-8') as snapshot_file:
+                snapshot = json.load(snapshot_file)
+            last_id = snapshot['last_id']
+            for todo_id, task, priority, completed in snapshot['todos']:
+                todos[todo_id] = {"id": todo_id, "task": task, "priority": priority, "completed": completed}
+
+        valid_size = 0
+        self.logged = 0
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'rb') as log_file:
+                for line in log_file:
+                    if not line.endswith(b'\n'):
+                        break  # torn write at the end of the log
+                    operation = json.loads(line)
+                    kind, todo_id = operation[0], operation[1] if len(operation) > 1 else None
+                    if kind == 'add':
+                        todos[todo_id] = {"id": todo_id, "task": operation[2],
+                                          "priority": operation[3], "completed": False}
+                        last_id = max(last_id, todo_id)
+                    elif kind == 'complete':
+                        if todo_id in todos:
+                            todos[todo_id]["completed"] = True
+                    elif kind == 'remove':
+                        todos.pop(todo_id, None)
+                    elif kind == 'clear':
+                        todos = {}
+                    else:
+                        raise ValueError(f"Unknown operation {kind!r} in {self.log_path}")
+                    valid_size += len(line)
+                    self.logged += 1
+
+        self._open_log(valid_size)
+        # Already in ID order: the log only adds IDs newer than the snapshot's
+        return list(todos.values()), last_id
+
+    def _open_log(self, size=0):
+        """Open the log for appending, cutting it to size bytes."""
+        if self._log is not None:
+            self._log.close()
+        self._log = open(self.log_path, 'ab')
+        self._log.truncate(size)
+        self._unsynced = 0
+
+    def _append(self, operation):
+        line = json.dumps(operation, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+        with self._lock:
+            if self._log is None:
+                self._open_log(os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0)
+            self._log.write(line)
+            self.logged += 1
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every:
+                self._sync()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.sync_interval, self._timed_sync)
+                self._timer.daemon = True
+                self._timer.start()
+        return self.compact_every is not None and self.logged >= self.compact_every
+
+    def added(self, todo):
+        return self._append(['add', todo["id"], todo["task"], todo["priority"]])
+
+    def completed(self, todo_id):
+        return self._append(['complete', todo_id])
+
+    def removed(self, todo_id):
+        return self._append(['remove', todo_id])
+
+    def cleared(self):
+        # Durable before the empty snapshot, in case the compaction is interrupted
+        self._append(['clear'])
+        self.sync()
+
+    def sync(self):
+        """Make every logged change durable."""
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        if self._log is not None and self._unsynced:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+        self._unsynced = 0
+
+    def _timed_sync(self):
+        """Timer callback: sync the changes of the last sync_interval seconds."""
+        with self._lock:
+            self._timer = None
+            self._sync()
+
+    def compact(self, todos, last_id):
+        """
+        Replace the snapshot with the given todos and start a new, empty log.
+
+        Args:
+            todos (iterable): Every current todo
+            last_id (int): Last ID handed out, so IDs are not reused after a restart
+        """
+        with _gc_paused():
+            snapshot = {
+                'last_id': last_id,
+                'todos': [[todo["id"], todo["task"], todo["priority"], todo["completed"]] for todo in todos],
+            }
+            text = json.dumps(snapshot, ensure_ascii=False, separators=(',', ':'))
+        handle, temporary = tempfile.mkstemp(dir=self.directory, prefix='.snapshot-', suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w', encoding='utf-8') as snapshot_file:
+                # One dumps() call is much faster than json.dump()'s chunked writes
+                snapshot_file.write(text)
+                snapshot_file.flush()
+                os.fsync(snapshot_file.fileno())
+            os.replace(temporary, self.snapshot_path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        _sync_directory(self.directory)
+
+        with self._lock:
+            self._open_log(0)
+            os.fsync(self._log.fileno())
+            self.logged = 0
+
+    def close(self):
+        """Sync and close the log."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._log is not None:
+                self._sync()
+                self._log.close()
+                self._log = None
+
+
+@contextlib.contextmanager
+def _gc_paused():
+    """
+    Turn the cyclic garbage collector off for a block.
+
+    Building or dumping a million todos allocates millions of containers,
+    which triggers full collections over the whole store again and again;
+    this more than doubles load and compaction times. Nothing built there
+    has reference cycles.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _sync_directory(directory):
+    """fsync a directory so a rename in it is durable (not possible on Windows)."""
+    if os.name != 'posix':
+        return
+    handle = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(handle)
+    finally:
+        os.close(handle)
+
+
+class SQLiteTodoStore:
+    """
+    TodoStore with the same interface, kept in a SQLite database.
+
+    Nothing is held in memory: filters and priority lookups are queries on
+    the (priority, id) and (completed, id) indexes, so they cost O(result)
+    and the store can hold more todos than fit in RAM. Todos come back as
+    new dicts; change them through the store.
+
+    The database runs in WAL mode with synchronous=NORMAL: each change is
+    its own transaction, and commits append to the WAL without an fsync
+    until a checkpoint. IDs use AUTOINCREMENT, so like IdAllocator they
+    are never reused, even after clear(). Every statement is a constant
+    string, so sqlite3's statement cache prepares each one only once.
+
+    To use it through bar's functions:
+        bar.todos = SQLiteTodoStore('todos.db')
+    """
+
+    def __init__(self, path, synchronous='NORMAL'):
+        """
+        Args:
+            path (str): Database file (':memory:' for a throwaway database)
+            synchronous (str): SQLite synchronous setting; 'FULL' also fsyncs every commit
+        """
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        self._connection.row_factory = _todo_from_row
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(f'PRAGMA synchronous={synchronous}')
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+
+    def __len__(self):
+        cursor = self._connection.cursor()
+        cursor.row_factory = None
+        return cursor.execute('SELECT count(*) FROM todos').fetchone()[0]
+
+    def __iter__(self):
+        return self._connection.execute(_SELECT + ' ORDER BY id')
+
+    def __contains__(self, todo_id):
+        return self.get(todo_id) is not None
+
+    def get(self, todo_id: int):
+        """Get a todo by its ID, or None."""
+        return self._connection.execute(_SELECT + ' WHERE id = ?', (todo_id,)).fetchone()
+
+    def add(self, task: str, priority: str = "medium"):
+        """Add a new todo and return it."""
+        with self._connection:
+            cursor = self._connection.execute(_INSERT, (task, priority))
+        return {"id": cursor.lastrowid, "task": task, "priority": priority, "completed": False}
+
+    def add_many(self, tasks):
+        """
+        Add many todos in one transaction with a single executemany.
+
+        Args:
+            tasks (iterable): (task, priority) pairs
+
+        Returns:
+            int: Number of todos added
+        """
+        with self._connection:
+            return self._connection.executemany(_INSERT, tasks).rowcount
+
+    def remove(self, todo_id: int):
+        """Remove a todo by its ID and return it, or None if there is none."""
+        with self._connection:
+            todo = self.get(todo_id)
+            if todo is not None:
+                self._connection.execute('DELETE FROM todos WHERE id = ?', (todo_id,))
+        return todo
+
+    def remove_many(self, todo_ids):
+        """Remove todos by ID in one transaction and return the IDs that were not found."""
+        todo_ids = list(todo_ids)
+        with self._connection:
+            existing = self._existing(todo_ids)
+            self._connection.executemany('DELETE FROM todos WHERE id = ?', ((todo_id,) for todo_id in existing))
+        not_found = []
+        for todo_id in todo_ids:
+            # Like TodoStore, an ID given twice is only found the first time
+            if todo_id in existing:
+                existing.discard(todo_id)
+            else:
+                not_found.append(todo_id)
+        return not_found
+
+    def mark_completed(self, todo_id: int):
+        """Mark a todo as completed by its ID and return it, or None if there is none."""
+        with self._connection:
+            self._connection.execute('UPDATE todos SET completed = 1 WHERE id = ? AND completed = 0', (todo_id,))
+        return self.get(todo_id)
+
+    def mark_completed_many(self, todo_ids):
+        """Mark todos as completed by ID in one transaction and return the IDs that were not found."""
+        todo_ids = list(todo_ids)
+        with self._connection:
+            existing = self._existing(todo_ids)
+            self._connection.executemany('UPDATE todos SET completed = 1 WHERE id = ? AND completed = 0',
+                                         ((todo_id,) for todo_id in existing))
+        return [todo_id for todo_id in todo_ids if todo_id not in existing]
+
+    def _existing(self, todo_ids):
+        """The set of the given IDs that are in the database."""
+        cursor = self._connection.cursor()
+        cursor.row_factory = None
+        existing = set()
+        for start in range(0, len(todo_ids), _ID_BATCH):
+            batch = todo_ids[start:start + _ID_BATCH]
+            # Full batches reuse one cached statement
+            placeholders = ','.join('?' * len(batch))
+            existing.update(row[0] for row in cursor.execute(
+                f'SELECT id FROM todos WHERE id IN ({placeholders})', batch))
+        return existing
+
+    def list(self, filter_by: str = "all"):
+        """Todos in the order they were added. Filter can be 'all', 'completed', or 'pending'."""
+        if filter_by == "completed":
+            return self._connection.execute(_SELECT + ' WHERE completed = 1 ORDER BY id').fetchall()
+        if filter_by == "pending":
+            return self._connection.execute(_SELECT + ' WHERE completed = 0 ORDER BY id').fetchall()
+        return self._connection.execute(_SELECT + ' ORDER BY id').fetchall()
+
+    def by_priority(self, priority: str):
+        """Todos with the given priority, in the order they were added."""
+        return self._connection.execute(_SELECT + ' WHERE priority = ? ORDER BY id', (priority,)).fetchall()
+
+    def clear(self):
+        """Remove every todo (their IDs are still not given out again)."""
+        with self._connection:
+            self._connection.execute('DELETE FROM todos')
+
+    def close(self):
+        """Close the database."""
+        self._connection.close()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS todos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS todos_by_priority ON todos (priority, id);
+CREATE INDEX IF NOT EXISTS todos_by_completed ON todos (completed, id);
+"""
+_SELECT = 'SELECT id, task, priority, completed FROM todos'
+_INSERT = 'INSERT INTO todos (task, priority) VALUES (?, ?)'
+# IDs per 'id IN (...)' lookup, below SQLite's old limit of 999 parameters
+_ID_BATCH = 500
+
+
+def _todo_from_row(cursor, row):
+    """sqlite3 row factory building bar's todo dicts."""
+    todo_id, task, priority, completed = row
+    return {"id": todo_id, "task": task, "priority": priority, "completed": bool(completed)}
+
+
+def run_log_benchmark(tasks=1_000_000, directory=None):
+    """
+    Measure write throughput and recovery time of LogBackend.
+
+    Adds tasks todos, completes every third and removes every fifth, then
+    times reopening the store from the log alone and from a fresh snapshot.
+
+    Args:
+        tasks (int): Number of todos to add
+        directory (str): Where to write the data (default: a temporary directory)
+    """
+    from bar import TodoStore
+
+    with tempfile.TemporaryDirectory(dir=directory) as data_directory:
+        store = TodoStore(backend=LogBackend(data_directory, compact_every=None))
+        start_time = time.perf_counter()
+        for number in range(tasks):
+            store.add(f"Task {number}", ("low", "medium", "high")[number % 3])
+        for todo_id in range(1, tasks + 1, 3):
+            store.mark_completed(todo_id)
+        for todo_id in range(1, tasks + 1, 5):
+            store.remove(todo_id)
+        store.backend.sync()
+        elapsed = time.perf_counter() - start_time
+        operations = store.backend.logged
+        log_size = os.path.getsize(store.backend.log_path)
+        store.close()
+
+        print("\n" + "="*50)
+        print(f"LOG BACKEND BENCHMARK ({tasks:,} tasks)")
+        print("="*50)
+        print(f"Writes: {operations:,} operations in {elapsed:.2f}s "
+              f"({operations / elapsed:,.0f} ops/s), log {log_size / 1e6:.1f} MB")
+
+        start_time = time.perf_counter()
+        store = TodoStore(backend=LogBackend(data_directory, compact_every=None))
+        print(f"Recovery from the log: {time.perf_counter() - start_time:.2f}s ({len(store):,} todos)")
+
+        start_time = time.perf_counter()
+        store.compact()
+        print(f"Compaction: {time.perf_counter() - start_time:.2f}s, "
+              f"snapshot {os.path.getsize(store.backend.snapshot_path) / 1e6:.1f} MB")
+        store.close()
+
+        start_time = time.perf_counter()
+        store = TodoStore(backend=LogBackend(data_directory))
+        print(f"Recovery from the snapshot: {time.perf_counter() - start_time:.2f}s ({len(store):,} todos)")
+        store.close()
+
+
+def _benchmark_tasks(tasks):
+    """(task, priority) pairs for the benchmarks; one todo in 100 is 'urgent'."""
+    priorities = ("low", "medium", "high")
+    for number in range(tasks):
+        yield f"Task {number}", "urgent" if number % 100 == 0 else priorities[number % 3]
+
+
+def run_sqlite_benchmark(sizes=(10_000, 1_000_000, 10_000_000), directory=None, samples=1000):
+    """
+    Compare SQLiteTodoStore with the plain in-memory list and with TodoStore.
+
+    For each size: bulk load time, the time of one get / mark_completed /
+    remove (averaged over samples random IDs) and of the 'completed' filter
+    and the 'urgent' priority lookup (samples and 1% of the todos).
+
+    Args:
+        sizes (iterable): Numbers of todos
+        directory (str): Where to put the databases (default: a temporary directory)
+        samples (int): Random IDs to look up, complete and remove
+    """
+    import random
+
+    from bar import TodoStore
+
+    def timed(function, *args):
+        start_time = time.perf_counter()
+        result = function(*args)
+        return time.perf_counter() - start_time, result
+
+    def per_operation(operation, ids):
+        return timed(lambda: [operation(todo_id) for todo_id in ids])[0] / len(ids)
+
+    print("\n" + "="*50)
+    print("SQLITE BACKEND BENCHMARK")
+    print("="*50)
+    print(f"{'tasks':>12} {'store':>8} {'load s':>8} {'get us':>10} {'complete us':>12} "
+          f"{'remove us':>10} {'completed ms':>13} {'urgent ms':>10}")
+
+    def report(tasks, name, load, get, complete, remove, completed, urgent):
+        print(f"{tasks:>12,} {name:>8} {load:>8.2f} {get * 1e6:>10.1f} {complete * 1e6:>12.1f} "
+              f"{remove * 1e6:>10.1f} {completed * 1000:>13.2f} {urgent * 1000:>10.2f}")
+
+    for tasks in sizes:
+        rng = random.Random(tasks)
+        complete_ids = rng.sample(range(1, tasks + 1), min(samples, tasks))
+        remove_ids = rng.sample(range(1, tasks + 1), min(samples, tasks))
+        # The list's linear scans are too slow to repeat samples times on big lists
+        list_ids = complete_ids[:max(1, min(samples, 10_000_000 // tasks))]
+
+        # bar.py before TodoStore: a list of dicts and linear scans
+        def build_list():
+            return [{"id": todo_id, "task": task, "priority": priority, "completed": False}
+                    for todo_id, (task, priority) in enumerate(_benchmark_tasks(tasks), 1)]
+
+        def list_complete(todo_id):
+            for todo in todos:
+                if todo["id"] == todo_id:
+                    todo["completed"] = True
+                    break
+
+        def list_get(todo_id):
+            return next(todo for todo in todos if todo["id"] == todo_id)
+
+        def list_remove(todo_id):
+            todos[:] = [todo for todo in todos if todo["id"] != todo_id]
+
+        load, todos = timed(build_list)
+        report(tasks, 'list', load, per_operation(list_get, list_ids),
+               per_operation(list_complete, list_ids),
+               per_operation(list_remove, list_ids[:3]),
+               timed(lambda: [todo for todo in todos if todo["completed"]])[0],
+               timed(lambda: [todo for todo in todos if todo["priority"] == "urgent"])[0])
+        del todos
+
+        def build_store():
+            store = TodoStore()
+            for task, priority in _benchmark_tasks(tasks):
+                store.add(task, priority)
+            return store
+
+        load, store = timed(build_store)
+        report(tasks, 'memory', load, per_operation(store.get, complete_ids),
+               per_operation(store.mark_completed, complete_ids), per_operation(store.remove, remove_ids),
+               timed(store.list, 'completed')[0], timed(store.by_priority, 'urgent')[0])
+        del store
+
+        with tempfile.TemporaryDirectory(dir=directory) as data_directory:
+            store = SQLiteTodoStore(os.path.join(data_directory, 'todos.db'))
+            load = timed(store.add_many, _benchmark_tasks(tasks))[0]
+            report(tasks, 'sqlite', load, per_operation(store.get, complete_ids),
+                   per_operation(store.mark_completed, complete_ids), per_operation(store.remove, remove_ids),
+                   timed(store.list, 'completed')[0], timed(store.by_priority, 'urgent')[0])
+            store.close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the todo backends')
+    parser.add_argument('backend', choices=('log', 'sqlite'), nargs='?', default='log')
+    parser.add_argument('--tasks', type=int, nargs='+', help='number(s) of todos')
+    arguments = parser.parse_args()
+    if arguments.backend == 'log':
+        run_log_benchmark(*(arguments.tasks or ())[:1])
+    else:
+        run_sqlite_benchmark(arguments.tasks or (10_000, 1_000_000, 10_000_000))